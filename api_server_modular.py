@@ -17,7 +17,7 @@ from datetime import datetime, timezone
 import uuid
 from typing import Optional
 from fastapi import FastAPI, File, UploadFile, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
@@ -31,7 +31,8 @@ from modules.test_generation import generate_test_cases_with_rag_context, enrich
 app = FastAPI(
     title="Secure PDF Processor API with Knowledge Graph & Test Generation",
     description="Complete compliance pipeline: Extract text, mask PII, enhance with RAG, build knowledge graph, generate test cases",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=ORJSONResponse  # 🚀 orjson serializes the large chunk/KG payloads much faster than stdlib json
 )
 
 # Add CORS middleware
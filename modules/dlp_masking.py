@@ -21,6 +21,14 @@ os.environ['GRPC_POLL_STRATEGY'] = 'poll'
 # Default DLP location (region). For content methods we use the global endpoint with a global parent.
 DLP_DEFAULT_LOCATION = os.getenv("DLP_LOCATION", "us")
 
+def normalize_embedding_text(text: str) -> str:
+    """
+    Normalize chunk text for RAG embedding (lowercase, newlines collapsed to spaces, trimmed)
+
+    Shared by every masking path so the normalization is defined once.
+    """
+    return text.lower().replace("\n", " ").strip()
+
 
 async def mask_chunks_with_dlp(docai_response: dict, project_id: str, gdpr_mode: bool = True, location: str = DLP_DEFAULT_LOCATION) -> dict:
     """
@@ -61,7 +69,7 @@ async def mask_chunks_with_dlp(docai_response: dict, project_id: str, gdpr_mode:
             chunk["original_text"] = chunk.get("text", "")
             
             # Add embedding_ready_text for RAG processing
-            chunk["embedding_ready_text"] = chunk["masked_text"].lower().replace("\n", " ").strip()
+            chunk["embedding_ready_text"] = normalize_embedding_text(chunk["masked_text"])
 
         # Post-processing: Merge edges and trace_links into relationships with unique IDs
         print(f"🔗 Creating relationships for improved traceability...")
@@ -197,7 +205,7 @@ async def mask_chunks_with_dlp(docai_response: dict, project_id: str, gdpr_mode:
             chunk["original_text"] = chunk.get("text", "")
             
             # Add embedding_ready_text for RAG processing
-            chunk["embedding_ready_text"] = chunk["masked_text"].lower().replace("\n", " ").strip()
+            chunk["embedding_ready_text"] = normalize_embedding_text(chunk["masked_text"])
 
             # Aggregate PII statistics
             if masked_result.get("pii_found", False):
@@ -329,7 +337,7 @@ async def mask_chunks_with_dlp(docai_response: dict, project_id: str, gdpr_mode:
             chunk["original_text"] = chunk.get("text", "")
             
             # Add embedding_ready_text for RAG processing
-            chunk["embedding_ready_text"] = chunk["masked_text"].lower().replace("\n", " ").strip()
+            chunk["embedding_ready_text"] = normalize_embedding_text(chunk["masked_text"])
         
         # Post-processing: Merge edges and trace_links into relationships even on error
         print(f"🔗 Creating relationships for improved traceability...")
@@ -6,6 +6,7 @@ Features:
 - PDF text extraction with Document AI API integration
 - Real bounding box extraction from layout.bounding_poly
 - Regex-based compliance standard detection (GDPR, CCPA, HIPAA, SOC2, ISO27001, PCI-DSS, FDA)
+  using RE2 Sets (all patterns matched in one linear-time scan)
 - Rule-based requirement detection using modal verbs and bullet points
 - Multiple label classification per chunk (security, compliance, technical, etc.)
 - Canonical compliance IDs (GDPR:2016/679, CCPA:CA-CIV-1798.100, etc.)
@@ -25,12 +26,26 @@ Response Structure:
 
 import os
 import re
+from collections import defaultdict
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Set
+from typing import Dict, Any, Iterable, List, Pattern, Set, Tuple
+import re2
 from google.cloud import documentai
 from google.cloud.documentai_v1 import DocumentProcessorServiceClient
 from .mock_data_loader import load_document_ai_mock
 
+# 🚀 PERFORMANCE: Precomputed zero-padded requirement/edge ids for the common range
+_PRECOMPUTED_ID_COUNT = 1024
+_REQ_IDS: Tuple[str, ...] = tuple(f"REQ-{i:03d}" for i in range(_PRECOMPUTED_ID_COUNT))
+_EDGE_IDS: Tuple[str, ...] = tuple(f"edge_{i:03d}" for i in range(_PRECOMPUTED_ID_COUNT))
+
+
+def _format_id(precomputed: Tuple[str, ...], prefix: str, counter: int) -> str:
+    """Return prefix + zero-padded counter, reusing the precomputed string when in range"""
+    if counter < len(precomputed):
+        return precomputed[counter]
+    return f"{prefix}{counter:03d}"
+
 
 def load_mock_docai_response() -> dict:
     """
@@ -45,8 +60,9 @@ def load_mock_docai_response() -> dict:
     
     # Update timestamp to current time if data was loaded successfully
     if mock_data and "source_document" in mock_data:
-        mock_data["source_document"]["id"] = f"doc_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}"
-        mock_data["source_document"]["processed_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        now = datetime.now(timezone.utc)
+        mock_data["source_document"]["id"] = f"doc_{now.strftime('%Y%m%d_%H%M%S')}"
+        mock_data["source_document"]["processed_at"] = now.isoformat(timespec="seconds")
     
     return mock_data
 
@@ -55,13 +71,14 @@ def create_fallback_mock_response() -> dict:
     """
     Create a minimal fallback mock response if the external file is not available
     """
+    now = datetime.now(timezone.utc)
     return {
         "status": "success",
         "agent": "Document AI",
         "source_document": {
             "name": "PRD-3.pdf",
-            "id": f"doc_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}",
-            "processed_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+            "id": f"doc_{now.strftime('%Y%m%d_%H%M%S')}",
+            "processed_at": now.isoformat(timespec="seconds")
         },
         "chunks": [],
         "metadata": {
@@ -170,15 +187,12 @@ def get_bounding_poly(layout) -> dict:
     Returns:
         Dictionary with normalized coordinates or None
     """
-    if not hasattr(layout, 'bounding_poly') or not layout.bounding_poly:
+    bounding_poly = getattr(layout, 'bounding_poly', None)
+    if not bounding_poly:
         return None
     
-    bounding_poly = layout.bounding_poly
-    if not hasattr(bounding_poly, 'normalized_vertices') or not bounding_poly.normalized_vertices:
-        return None
-    
-    vertices = bounding_poly.normalized_vertices
-    if len(vertices) < 2:
+    vertices = getattr(bounding_poly, 'normalized_vertices', None)
+    if not vertices or len(vertices) < 2:
         return None
     
     # Get min/max from all vertices
@@ -196,6 +210,117 @@ def get_bounding_poly(layout) -> dict:
     }
 
 
+# Compliance standard patterns (standard key -> patterns, canonical ID, display name)
+_COMPLIANCE_PATTERNS = {
+    'GDPR': {
+        'patterns': [
+            r'\bGDPR\b',
+            r'General Data Protection Regulation',
+            r'GDPR\s+Article\s+\d+',
+            r'\bdata protection\b.*\bEU\b',
+            r'\bright to be forgotten\b',
+            r'\bdata subject rights\b'
+        ],
+        'canonical_id': 'GDPR:2016/679',
+        'name': 'GDPR'
+    },
+    'CCPA': {
+        'patterns': [
+            r'\bCCPA\b',
+            r'California Consumer Privacy Act',
+            r'\bconsumer privacy rights\b.*\bCalifornia\b',
+            r'\bdo not sell\b.*\bpersonal information\b'
+        ],
+        'canonical_id': 'CCPA:CA-CIV-1798.100',
+        'name': 'CCPA'
+    },
+    'HIPAA': {
+        'patterns': [
+            r'\bHIPAA\b',
+            r'Health Insurance Portability',
+            r'\bPHI\b.*\bprotection\b',
+            r'\bprotected health information\b',
+            r'HIPAA\s+§\s*\d+'
+        ],
+        'canonical_id': 'HIPAA:45-CFR-164',
+        'name': 'HIPAA'
+    },
+    'SOC2': {
+        'patterns': [
+            r'\bSOC\s*2\b',
+            r'\bSOC2\b',
+            r'SOC\s*2\s+Type\s+(I|II)',
+            r'\bservice organization control\b'
+        ],
+        'canonical_id': 'SOC2:AICPA-TSC',
+        'name': 'SOC2'
+    },
+    'ISO27001': {
+        'patterns': [
+            r'\bISO\s*27001\b',
+            r'\bISO/IEC\s*27001\b',
+            r'information security management'
+        ],
+        'canonical_id': 'ISO27001:2013',
+        'name': 'ISO27001'
+    },
+    'PCI-DSS': {
+        'patterns': [
+            r'\bPCI\s*DSS\b',
+            r'\bPCI-DSS\b',
+            r'Payment Card Industry',
+            r'\bcardholder data\b.*\bsecurity\b'
+        ],
+        'canonical_id': 'PCI-DSS:v4.0',
+        'name': 'PCI-DSS'
+    },
+    'FDA_21CFR11': {
+        'patterns': [
+            r'\bFDA\s+21\s+CFR\s+Part\s+11\b',
+            r'\b21\s+CFR\s+11\b',
+            r'\belectronic signatures\b.*\bFDA\b'
+        ],
+        'canonical_id': 'FDA:21-CFR-11',
+        'name': 'FDA 21 CFR Part 11'
+    }
+}
+
+
+def _compile_search_set(patterns: Iterable[str]) -> re2.Set:
+    """
+    Compile patterns into a case-insensitive RE2 Set
+
+    RE2 matches every pattern of the set simultaneously in one linear-time
+    scan of the text; Match() returns the indices (in add order) of the
+    patterns that occur anywhere in the text.
+    """
+    options = re2.Options()
+    options.case_sensitive = False
+    search_set = re2.Set.SearchSet(options)
+    for pattern in patterns:
+        search_set.Add(pattern)
+    search_set.Compile()
+    return search_set
+
+
+# 🚀 PERFORMANCE: Frozen (name, canonical_id) table built once at import, plus one RE2 Set
+# holding each standard's patterns as a single alternation (set index == table index)
+_COMPLIANCE_TABLE: Tuple[Tuple[str, str], ...] = tuple(
+    (info['name'], info['canonical_id']) for info in _COMPLIANCE_PATTERNS.values()
+)
+_COMPLIANCE_ALTERNATIONS: Tuple[str, ...] = tuple(
+    '|'.join(f'(?:{pattern})' for pattern in info['patterns'])
+    for info in _COMPLIANCE_PATTERNS.values()
+)
+_COMPLIANCE_SET = _compile_search_set(_COMPLIANCE_ALTERNATIONS)
+# Same alternations on the stdlib engine for non-ASCII text: RE2's \b, \s and \d are
+# ASCII-only (so NBSP / narrow-space separated "SOC 2", "21 CFR 11" would be missed)
+# and RE2 cannot encode lone surrogates, so it is only exact on ASCII input
+_COMPLIANCE_REGEXES: Tuple[Pattern, ...] = tuple(
+    re.compile(alternation, re.IGNORECASE) for alternation in _COMPLIANCE_ALTERNATIONS
+)
+
+
 def detect_compliance_standards(text: str) -> List[Dict[str, str]]:
     """
     2️⃣ Regex-based compliance detection in text with canonical IDs
@@ -206,92 +331,50 @@ def detect_compliance_standards(text: str) -> List[Dict[str, str]]:
     Returns:
         List of detected compliance standards with canonical IDs
     """
-    compliance_patterns = {
-        'GDPR': {
-            'patterns': [
-                r'\bGDPR\b',
-                r'General Data Protection Regulation',
-                r'GDPR\s+Article\s+\d+',
-                r'\bdata protection\b.*\bEU\b',
-                r'\bright to be forgotten\b',
-                r'\bdata subject rights\b'
-            ],
-            'canonical_id': 'GDPR:2016/679',
-            'name': 'GDPR'
-        },
-        'CCPA': {
-            'patterns': [
-                r'\bCCPA\b',
-                r'California Consumer Privacy Act',
-                r'\bconsumer privacy rights\b.*\bCalifornia\b',
-                r'\bdo not sell\b.*\bpersonal information\b'
-            ],
-            'canonical_id': 'CCPA:CA-CIV-1798.100',
-            'name': 'CCPA'
-        },
-        'HIPAA': {
-            'patterns': [
-                r'\bHIPAA\b',
-                r'Health Insurance Portability',
-                r'\bPHI\b.*\bprotection\b',
-                r'\bprotected health information\b',
-                r'HIPAA\s+§\s*\d+'
-            ],
-            'canonical_id': 'HIPAA:45-CFR-164',
-            'name': 'HIPAA'
-        },
-        'SOC2': {
-            'patterns': [
-                r'\bSOC\s*2\b',
-                r'\bSOC2\b',
-                r'SOC\s*2\s+Type\s+(I|II)',
-                r'\bservice organization control\b'
-            ],
-            'canonical_id': 'SOC2:AICPA-TSC',
-            'name': 'SOC2'
-        },
-        'ISO27001': {
-            'patterns': [
-                r'\bISO\s*27001\b',
-                r'\bISO/IEC\s*27001\b',
-                r'information security management'
-            ],
-            'canonical_id': 'ISO27001:2013',
-            'name': 'ISO27001'
-        },
-        'PCI-DSS': {
-            'patterns': [
-                r'\bPCI\s*DSS\b',
-                r'\bPCI-DSS\b',
-                r'Payment Card Industry',
-                r'\bcardholder data\b.*\bsecurity\b'
-            ],
-            'canonical_id': 'PCI-DSS:v4.0',
-            'name': 'PCI-DSS'
-        },
-        'FDA_21CFR11': {
-            'patterns': [
-                r'\bFDA\s+21\s+CFR\s+Part\s+11\b',
-                r'\b21\s+CFR\s+11\b',
-                r'\belectronic signatures\b.*\bFDA\b'
-            ],
-            'canonical_id': 'FDA:21-CFR-11',
-            'name': 'FDA 21 CFR Part 11'
-        }
-    }
-    
-    detected = []
-    
-    for standard_key, standard_info in compliance_patterns.items():
-        for pattern in standard_info['patterns']:
-            if re.search(pattern, text, re.IGNORECASE):
-                detected.append({
-                    'name': standard_info['name'],
-                    'canonical_id': standard_info['canonical_id']
-                })
-                break  # Only add once per standard
-    
-    return detected
+    # str.isascii() is O(1); ASCII text (the common case) takes the single RE2 scan
+    if text.isascii():
+        matched = sorted(_COMPLIANCE_SET.Match(text) or ())
+    else:
+        matched = [index for index, regex in enumerate(_COMPLIANCE_REGEXES) if regex.search(text)]
+    return [
+        {'name': name, 'canonical_id': canonical_id}
+        for name, canonical_id in (_COMPLIANCE_TABLE[index] for index in matched)
+    ]
+
+
+# 1️⃣ Modal verbs pattern (strict requirements)
+_MODAL_VERBS = [
+    'shall', 'must', 'should', 'will', 'may',
+    'needs to', 'required to', 'has to', 'ought to', 'supposed to'
+]
+_MODAL_PATTERN = r'\b(?:' + '|'.join(_MODAL_VERBS) + r')\b'
+
+# 2️⃣ Key action verbs (feature/capability requirements)
+_ACTION_VERBS = [
+    'provide', 'support', 'enable', 'allow', 'implement',
+    'ensure', 'guarantee', 'deliver', 'offer', 'include',
+    'facilitate', 'perform', 'execute', 'process', 'handle'
+]
+_ACTION_PATTERN = r'\b(?:' + '|'.join(_ACTION_VERBS) + r')(?:s|ing)?\b'
+
+# 🚀 PERFORMANCE: Requirement detection regexes compiled once at import
+_SECTION_RE = re.compile(r'^[A-Z][a-zA-Z\s&-]{3,40}:(?!\n)')  # 3️⃣ "Feature Name:" or "Security:"
+_SENT_SPLIT_RE = re.compile(r'[.!?]\s+')
+
+# 🚀 PERFORMANCE: Modal / action / bullet checks fused into one regex, matched once per sentence.
+# Each arm is anchored at the sentence start (modal and action verbs via a lookahead that scans
+# the sentence), so alternation order keeps the MODAL > ACTION > BULLET priority; m.lastgroup
+# names the winning kind. Verb matching is case-insensitive, bullet markers are case-sensitive.
+_REQ_KIND_RE = re.compile(
+    r'(?P<MODAL_VERB>(?=.*?(?i:' + _MODAL_PATTERN + r')))'
+    r'|(?P<ACTION_VERB>(?=.*?(?i:' + _ACTION_PATTERN + r')))'
+    r'|(?P<BULLET_POINT>\s*(?:[\-\*•○]|[0-9a-z]+[\.\)])\s+)'
+)
+
+# Action-verb sentences must mention one of these to count (filters out common prose).
+# Matched as a single multi-keyword alternation: one scan per sentence instead of one per keyword.
+_ACTION_CONTEXT_KEYWORDS = ['system', 'user', 'feature', 'application', 'data', 'service', 'platform']
+_ACTION_CONTEXT_RE = re.compile('|'.join(map(re.escape, _ACTION_CONTEXT_KEYWORDS)))
 
 
 def detect_requirements(text: str) -> List[Dict[str, Any]]:
@@ -313,24 +396,6 @@ def detect_requirements(text: str) -> List[Dict[str, Any]]:
     """
     requirements = []
 
-    # 1️⃣ Modal verbs pattern (strict requirements)
-    modal_verbs = [
-        'shall', 'must', 'should', 'will', 'may',
-        'needs to', 'required to', 'has to', 'ought to', 'supposed to'
-    ]
-    modal_pattern = r'\b(' + '|'.join(modal_verbs) + r')\b'
-
-    # 2️⃣ Key action verbs (feature/capability requirements)
-    action_verbs = [
-        'provide', 'support', 'enable', 'allow', 'implement',
-        'ensure', 'guarantee', 'deliver', 'offer', 'include',
-        'facilitate', 'perform', 'execute', 'process', 'handle'
-    ]
-    action_pattern = r'\b(' + '|'.join(action_verbs) + r')(?:s|ing)?\b'
-
-    # 3️⃣ Section header pattern (high-level requirements)
-    section_pattern = r'^[A-Z][a-zA-Z\s&-]{3,40}:(?!\n)'  # "Feature Name:" or "Security:"
-
     # Split text into lines and sentences
     lines = text.split('\n')
     req_id_counter = 1
@@ -342,11 +407,11 @@ def detect_requirements(text: str) -> List[Dict[str, Any]]:
             continue
 
         # Check for section headers (e.g., "Security:", "Performance:")
-        if re.match(section_pattern, line):
+        if _SECTION_RE.match(line):
             req_text = line.split(':')[0].strip()
             if req_text not in seen_texts and len(req_text) > 5:
                 requirements.append({
-                    "id": f"REQ-{req_id_counter:03d}",
+                    "id": _format_id(_REQ_IDS, "REQ-", req_id_counter),
                     "text": line[:200],  # Limit to 200 chars
                     "type": "SECTION_HEADER",
                     "confidence": 0.75
@@ -354,8 +419,11 @@ def detect_requirements(text: str) -> List[Dict[str, Any]]:
                 seen_texts.add(req_text)
                 req_id_counter += 1
 
-        # Split line into sentences
-        sentences = re.split(r'[.!?]\s+', line)
+        # Split line into sentences (lines without sentence punctuation skip the regex engine)
+        if '.' in line or '!' in line or '?' in line:
+            sentences = _SENT_SPLIT_RE.split(line)
+        else:
+            sentences = (line,)
 
         for sentence in sentences:
             sentence = sentence.strip()
@@ -366,10 +434,15 @@ def detect_requirements(text: str) -> List[Dict[str, Any]]:
             if sentence in seen_texts:
                 continue
 
+            kind_match = _REQ_KIND_RE.match(sentence)
+            if kind_match is None:
+                continue
+            kind = kind_match.lastgroup
+
             # 4️⃣ Check for modal verbs (strict requirements)
-            if re.search(modal_pattern, sentence, re.IGNORECASE):
+            if kind == "MODAL_VERB":
                 requirements.append({
-                    "id": f"REQ-{req_id_counter:03d}",
+                    "id": _format_id(_REQ_IDS, "REQ-", req_id_counter),
                     "text": sentence,
                     "type": "MODAL_VERB",
                     "confidence": 0.85
@@ -378,11 +451,11 @@ def detect_requirements(text: str) -> List[Dict[str, Any]]:
                 req_id_counter += 1
 
             # 5️⃣ Check for action verbs (feature/capability requirements)
-            elif re.search(action_pattern, sentence, re.IGNORECASE):
+            elif kind == "ACTION_VERB":
                 # Additional filter: avoid common prose (must contain system/user/feature/data)
-                if any(keyword in sentence.lower() for keyword in ['system', 'user', 'feature', 'application', 'data', 'service', 'platform']):
+                if _ACTION_CONTEXT_RE.search(sentence.lower()):
                     requirements.append({
-                        "id": f"REQ-{req_id_counter:03d}",
+                        "id": _format_id(_REQ_IDS, "REQ-", req_id_counter),
                         "text": sentence,
                         "type": "ACTION_VERB",
                         "confidence": 0.7
@@ -391,11 +464,11 @@ def detect_requirements(text: str) -> List[Dict[str, Any]]:
                     req_id_counter += 1
 
             # 6️⃣ Check for bullet points or numbered lists
-            elif re.match(r'^\s*[\-\*•○]\s+', sentence) or re.match(r'^\s*[0-9a-z]+[\.\)]\s+', sentence):
+            elif kind == "BULLET_POINT":
                 # Lowered threshold from 20 to 15 characters
                 if len(sentence) > 15:
                     requirements.append({
-                        "id": f"REQ-{req_id_counter:03d}",
+                        "id": _format_id(_REQ_IDS, "REQ-", req_id_counter),
                         "text": sentence,
                         "type": "BULLET_POINT",
                         "confidence": 0.7
@@ -406,6 +479,26 @@ def detect_requirements(text: str) -> List[Dict[str, Any]]:
     return requirements
 
 
+# 6️⃣ Chunk label keywords (label -> keywords), in output order
+_LABEL_KEYWORDS = {
+    "ACCEPTANCE_CRITERIA": ['acceptance criteria', 'acceptance test', 'ac:'],
+    "SECURITY": ['security', 'authentication', 'authorization', 'encryption'],
+    "PERFORMANCE": ['performance', 'scalability', 'load', 'response time'],
+    "COMPLIANCE": ['compliance', 'regulation', 'gdpr', 'hipaa', 'sox', 'ccpa'],
+    "FUNCTIONAL_REQUIREMENT": ['functional requirement', 'user story', 'feature'],
+    "TECHNICAL": ['technical', 'architecture', 'design'],
+    "TEST": ['test', 'testing', 'qa']
+}
+
+# 🚀 PERFORMANCE: One RE2 Set entry per label (escaped keyword alternation). All labels are
+# evaluated in a single linear scan, and overlapping hits ("acceptance test" is both
+# ACCEPTANCE_CRITERIA and TEST) are reported because each set entry matches independently.
+_LABEL_NAMES: Tuple[str, ...] = tuple(_LABEL_KEYWORDS)
+_LABEL_SET = _compile_search_set(
+    '|'.join(map(re2.escape, keywords)) for keywords in _LABEL_KEYWORDS.values()
+)
+
+
 def classify_chunk_labels(text: str) -> List[str]:
     """
     6️⃣ Classify chunk with multiple labels based on section headings and content
@@ -416,36 +509,146 @@ def classify_chunk_labels(text: str) -> List[str]:
     Returns:
         List of applicable chunk labels (can be multiple)
     """
-    labels = []
-    text_lower = text.lower()
+    # Single case-insensitive pass over the text; sorted set indices keep the canonical label order.
+    # RE2 case folding equals str.lower() only on ASCII (and it cannot encode lone
+    # surrogates), so other text uses the plain lowercase substring check
+    if text.isascii():
+        labels = [_LABEL_NAMES[index] for index in sorted(_LABEL_SET.Match(text) or ())]
+    else:
+        text_lower = text.lower()
+        labels = [
+            name for name, keywords in _LABEL_KEYWORDS.items()
+            if any(keyword in text_lower for keyword in keywords)
+        ]
+    
+    # If no specific labels found, mark as GENERAL
+    if not labels:
+        labels.append("GENERAL")
+    
+    return labels
+
+
+# Document AI entity types treated as compliance / requirement entities (O(1) membership)
+_COMPLIANCE_ENTITY_TYPES = frozenset({"COMPLIANCE", "REGULATION", "STANDARD"})
+_REQUIREMENT_ENTITY_TYPES = frozenset({"REQUIREMENT", "FUNCTIONAL_REQUIREMENT"})
+
+
+def _build_page_chunk(page, page_num: int, doc_text: str, document_name: str,
+                      entities_by_page: dict, requirement_entities_by_page: dict,
+                      compliance_entities_by_page: dict) -> dict:
+    """
+    Extract one page's text and build its chunk (labels, detected requirements/compliance, entities)
     
-    # Check for specific section headings and keywords
-    if any(keyword in text_lower for keyword in ['acceptance criteria', 'acceptance test', 'ac:']):
-        labels.append("ACCEPTANCE_CRITERIA")
+    Returns:
+        Chunk dictionary, or None if the page has no text
+    """
+    page_parts = []  # 🚀 Collected segment texts, joined once (avoids quadratic +=)
+    page_start_index = None
+    page_end_index = None
+    page_bounding_box = None
+    
+    # Extract text from page - handle different text extraction methods
+    blocks = getattr(page, 'blocks', None)
+    if blocks:
+        # Extract text from blocks with real bounding boxes
+        for block in blocks:
+            layout = getattr(block, 'layout', None)
+            if layout:
+                # 3️⃣ Get real bounding box
+                if not page_bounding_box:
+                    page_bounding_box = get_bounding_poly(layout)
+                
+                text_anchor = getattr(layout, 'text_anchor', None)
+                if text_anchor:
+                    for segment in getattr(text_anchor, 'text_segments', ()):
+                        start_index = segment.start_index
+                        end_index = segment.end_index
+                        if start_index is not None and end_index is not None:
+                            # 5️⃣ Track text anchor indices
+                            if page_start_index is None:
+                                page_start_index = start_index
+                            page_end_index = end_index
+                            page_parts.append(doc_text[start_index:end_index])
+    
+    # Fallback: extract text from paragraphs if blocks don't exist
+    paragraphs = getattr(page, 'paragraphs', None) if not page_parts else None
+    if paragraphs:
+        for paragraph in paragraphs:
+            layout = getattr(paragraph, 'layout', None)
+            if layout:
+                # 3️⃣ Get real bounding box
+                if not page_bounding_box:
+                    page_bounding_box = get_bounding_poly(layout)
+                
+                text_anchor = getattr(layout, 'text_anchor', None)
+                if text_anchor:
+                    for segment in getattr(text_anchor, 'text_segments', ()):
+                        start_index = segment.start_index
+                        end_index = segment.end_index
+                        if start_index is not None and end_index is not None:
+                            # 5️⃣ Track text anchor indices
+                            if page_start_index is None:
+                                page_start_index = start_index
+                            page_end_index = end_index
+                            page_parts.append(doc_text[start_index:end_index])
+    
+    # Each segment is newline-terminated
+    page_text = "\n".join(page_parts) + "\n" if page_parts else ""
+    
+    # Only create a chunk if the page has text
+    if not page_text.strip():
+        return None
     
-    if any(keyword in text_lower for keyword in ['security', 'authentication', 'authorization', 'encryption']):
-        labels.append("SECURITY")
+    # Get entities for this specific page
+    page_entities = entities_by_page.get(page_num, ())
     
-    if any(keyword in text_lower for keyword in ['performance', 'scalability', 'load', 'response time']):
-        labels.append("PERFORMANCE")
+    # 6️⃣ Classify chunk with multiple labels
+    chunk_labels = classify_chunk_labels(page_text)
     
-    if any(keyword in text_lower for keyword in ['compliance', 'regulation', 'gdpr', 'hipaa', 'sox', 'ccpa']):
-        labels.append("COMPLIANCE")
+    # 2️⃣ Detect compliance standards using regex
+    detected_compliance = detect_compliance_standards(page_text)
     
-    if any(keyword in text_lower for keyword in ['functional requirement', 'user story', 'feature']):
-        labels.append("FUNCTIONAL_REQUIREMENT")
+    # 3️⃣ Detect requirements using rule-based detection
+    detected_requirements = detect_requirements(page_text)
     
-    if any(keyword in text_lower for keyword in ['technical', 'architecture', 'design']):
-        labels.append("TECHNICAL")
+    chunk_data = {
+        "chunk_id": f"chunk_{page_num:03d}",
+        "labels": chunk_labels,  # 6️⃣ Multiple labels instead of single chunk_type
+        "page_number": page_num,
+        "text": page_text.strip(),
+        "confidence": sum(e.get("confidence", 0) for e in page_entities) / len(page_entities) if page_entities else 0.9
+    }
     
-    if any(keyword in text_lower for keyword in ['test', 'testing', 'qa']):
-        labels.append("TEST")
+    # 5️⃣ Add text_anchor for chunk
+    if page_start_index is not None and page_end_index is not None:
+        chunk_data["text_anchor"] = {
+            "start": page_start_index,
+            "end": page_end_index
+        }
     
-    # If no specific labels found, mark as GENERAL
-    if not labels:
-        labels.append("GENERAL")
+    # 3️⃣ Add real bounding box if available
+    if page_bounding_box:
+        chunk_data["bounding_box"] = page_bounding_box
     
-    return labels
+    # 2️⃣ Add detected compliance standards
+    if detected_compliance:
+        chunk_data["detected_compliance"] = detected_compliance
+    
+    # 3️⃣ Add detected requirements
+    if detected_requirements:
+        chunk_data["detected_requirements"] = detected_requirements
+    
+    # 4️⃣ Only add entity arrays if they have content (drop empty arrays)
+    req_entities = requirement_entities_by_page.get(page_num)
+    comp_entities = compliance_entities_by_page.get(page_num)
+    
+    if req_entities:
+        chunk_data["requirement_entities"] = req_entities
+    if comp_entities:
+        chunk_data["compliance_entities"] = comp_entities
+    
+    chunk_data["source"] = document_name
+    return chunk_data
 
 
 def parse_document_ai_response(document: documentai.Document, document_name: str, processor_info: dict = None) -> dict:
@@ -466,36 +669,49 @@ def parse_document_ai_response(document: documentai.Document, document_name: str
     compliance_entities = []
     requirement_entities = []
     
+    # 🚀 PERFORMANCE: Page indexes filled during entity extraction (no per-page rescans)
+    entities_by_page = defaultdict(list)
+    requirement_entities_by_page = defaultdict(list)
+    compliance_entities_by_page = defaultdict(list)
+    
     # 2️⃣ Extract document-level entities OUTSIDE the page loop
-    if hasattr(document, 'entities') and document.entities:
-        for entity in document.entities:
-            entity_text = entity.mention_text if hasattr(entity, 'mention_text') else ""
+    # 🚀 getattr(obj, name, None) + local binding instead of hasattr + repeated attribute access
+    document_entities = getattr(document, 'entities', None)
+    if document_entities:
+        for entity in document_entities:
+            entity_text = getattr(entity, 'mention_text', "") or ""
             if entity_text:
                 # Get page number from entity's text anchor if available
                 page_number = 1  # Default
-                if hasattr(entity, 'page_anchor') and entity.page_anchor:
-                    if hasattr(entity.page_anchor, 'page_refs') and entity.page_anchor.page_refs:
-                        page_ref = entity.page_anchor.page_refs[0]
-                        if hasattr(page_ref, 'page'):
-                            page_number = page_ref.page + 1  # Convert 0-indexed to 1-indexed
+                page_anchor = getattr(entity, 'page_anchor', None)
+                if page_anchor:
+                    page_refs = getattr(page_anchor, 'page_refs', None)
+                    if page_refs:
+                        page_ref_page = getattr(page_refs[0], 'page', None)
+                        if page_ref_page is not None:
+                            page_number = page_ref_page + 1  # Convert 0-indexed to 1-indexed
                 
                 # Get text anchor indices
                 text_anchor = None
-                if hasattr(entity, 'text_anchor') and entity.text_anchor:
-                    if hasattr(entity.text_anchor, 'text_segments') and entity.text_anchor.text_segments:
-                        segment = entity.text_anchor.text_segments[0]
-                        if hasattr(segment, 'start_index') and hasattr(segment, 'end_index'):
+                entity_text_anchor = getattr(entity, 'text_anchor', None)
+                if entity_text_anchor:
+                    text_segments = getattr(entity_text_anchor, 'text_segments', None)
+                    if text_segments:
+                        segment = text_segments[0]
+                        start_index = getattr(segment, 'start_index', None)
+                        end_index = getattr(segment, 'end_index', None)
+                        if start_index is not None and end_index is not None:
                             text_anchor = {
-                                "start": segment.start_index,
-                                "end": segment.end_index
+                                "start": start_index,
+                                "end": end_index
                             }
                 
                 entity_data = {
-                    "id": entity.id if hasattr(entity, 'id') and entity.id else f"entity_{len(all_entities) + 1}",
+                    "id": getattr(entity, 'id', None) or f"entity_{len(all_entities) + 1}",
                     "text": entity_text,
-                    "confidence": entity.confidence if hasattr(entity, 'confidence') else 0.0,
+                    "confidence": getattr(entity, 'confidence', 0.0),
                     "page_number": page_number,
-                    "type": entity.type_ if hasattr(entity, 'type_') and entity.type_ else "UNKNOWN"
+                    "type": getattr(entity, 'type_', None) or "UNKNOWN"
                 }
                 
                 # 5️⃣ Add text_anchor if available
@@ -503,132 +719,27 @@ def parse_document_ai_response(document: documentai.Document, document_name: str
                     entity_data["text_anchor"] = text_anchor
                 
                 all_entities.append(entity_data)
+                entities_by_page[page_number].append(entity_data)
                 
                 # Categorize entities
                 entity_type = entity_data["type"]
-                if entity_type in ["COMPLIANCE", "REGULATION", "STANDARD"]:
+                if entity_type in _COMPLIANCE_ENTITY_TYPES:
                     compliance_entities.append(entity_data)
-                elif entity_type in ["REQUIREMENT", "FUNCTIONAL_REQUIREMENT"]:
+                    compliance_entities_by_page[page_number].append(entity_data)
+                elif entity_type in _REQUIREMENT_ENTITY_TYPES:
                     requirement_entities.append(entity_data)
+                    requirement_entities_by_page[page_number].append(entity_data)
     
-    # Extract text chunks from pages
-    for page_num, page in enumerate(document.pages, 1):
-        page_text = ""
-        page_start_index = None
-        page_end_index = None
-        page_bounding_box = None
-        
-        # Extract text from page - handle different text extraction methods
-        if hasattr(page, 'blocks') and page.blocks:
-            # Extract text from blocks with real bounding boxes
-            for block in page.blocks:
-                if hasattr(block, 'layout') and block.layout:
-                    # 3️⃣ Get real bounding box
-                    if not page_bounding_box and block.layout:
-                        page_bounding_box = get_bounding_poly(block.layout)
-                    
-                    if hasattr(block.layout, 'text_anchor') and block.layout.text_anchor:
-                        if hasattr(block.layout.text_anchor, 'text_segments'):
-                            for segment in block.layout.text_anchor.text_segments:
-                                if segment.start_index is not None and segment.end_index is not None:
-                                    # 5️⃣ Track text anchor indices
-                                    if page_start_index is None:
-                                        page_start_index = segment.start_index
-                                    page_end_index = segment.end_index
-                                    page_text += document.text[segment.start_index:segment.end_index] + "\n"
-        
-        # Fallback: extract text from paragraphs if blocks don't exist
-        if not page_text and hasattr(page, 'paragraphs') and page.paragraphs:
-            for paragraph in page.paragraphs:
-                if hasattr(paragraph, 'layout') and paragraph.layout:
-                    # 3️⃣ Get real bounding box
-                    if not page_bounding_box:
-                        page_bounding_box = get_bounding_poly(paragraph.layout)
-                    
-                    if hasattr(paragraph.layout, 'text_anchor') and paragraph.layout.text_anchor:
-                        if hasattr(paragraph.layout.text_anchor, 'text_segments'):
-                            for segment in paragraph.layout.text_anchor.text_segments:
-                                if segment.start_index is not None and segment.end_index is not None:
-                                    # 5️⃣ Track text anchor indices
-                                    if page_start_index is None:
-                                        page_start_index = segment.start_index
-                                    page_end_index = segment.end_index
-                                    page_text += document.text[segment.start_index:segment.end_index] + "\n"
-        
-        # Create chunks from page content if text exists
-        if page_text.strip():
-            # Get entities for this specific page
-            page_entities = [e for e in all_entities if e.get("page_number") == page_num]
-            
-            # 6️⃣ Classify chunk with multiple labels
-            chunk_labels = classify_chunk_labels(page_text)
-            
-            # 2️⃣ Detect compliance standards using regex
-            detected_compliance = detect_compliance_standards(page_text)
-            
-            # 3️⃣ Detect requirements using rule-based detection
-            detected_requirements = detect_requirements(page_text)
-            
-            chunk_data = {
-                "chunk_id": f"chunk_{page_num:03d}",
-                "labels": chunk_labels,  # 6️⃣ Multiple labels instead of single chunk_type
-                "page_number": page_num,
-                "text": page_text.strip(),
-                "confidence": sum(e.get("confidence", 0) for e in page_entities) / len(page_entities) if page_entities else 0.9
-            }
-            
-            # 5️⃣ Add text_anchor for chunk
-            if page_start_index is not None and page_end_index is not None:
-                chunk_data["text_anchor"] = {
-                    "start": page_start_index,
-                    "end": page_end_index
-                }
-            
-            # 3️⃣ Add real bounding box if available
-            if page_bounding_box:
-                chunk_data["bounding_box"] = page_bounding_box
-            
-            # 2️⃣ Add detected compliance standards
-            if detected_compliance:
-                chunk_data["detected_compliance"] = detected_compliance
-            
-            # 3️⃣ Add detected requirements
-            if detected_requirements:
-                chunk_data["detected_requirements"] = detected_requirements
-            
-            # 4️⃣ Only add entity arrays if they have content (drop empty arrays)
-            req_entities = [e for e in page_entities if e["type"] in ["REQUIREMENT", "FUNCTIONAL_REQUIREMENT"]]
-            comp_entities = [e for e in page_entities if e["type"] in ["COMPLIANCE", "REGULATION", "STANDARD"]]
-            
-            if req_entities:
-                chunk_data["requirement_entities"] = req_entities
-            if comp_entities:
-                chunk_data["compliance_entities"] = comp_entities
-            
-            chunk_data["source"] = document_name
-            chunks.append(chunk_data)
-    
-    # Calculate base metadata
-    total_pages = len(document.pages) if hasattr(document, 'pages') else 0
-    total_chunks = len(chunks)
-    text_length = len(document.text) if hasattr(document, 'text') and document.text else 0
+    doc_text = document.text  # Bind once; sliced for every text segment below
+    pages = document.pages
     
-    # 1️⃣ Count detected requirements and compliance from chunks
+    # 1️⃣ Count detected requirements and compliance (entities + rule-based detections from chunks)
     total_detected_requirements = len(requirement_entities)
     total_detected_compliance = len(compliance_entities)
     
-    # Add rule-based detections from chunks
-    for chunk in chunks:
-        if "detected_requirements" in chunk:
-            total_detected_requirements += len(chunk["detected_requirements"])
-        if "detected_compliance" in chunk:
-            total_detected_compliance += len(chunk["detected_compliance"])
-    
-    # Total entities = requirements + compliance only
-    total_detected_entities = total_detected_requirements + total_detected_compliance
-    
     # 2️⃣ Build enhanced traceability edges (requirement → compliance) with normalized relationships
     edges = []
+    edges_by_page = defaultdict(list)  # 🚀 page -> edges (same dict objects) for trace_links
     edge_id_counter = 1
     
     # Link entity-based requirements to entity-based compliance
@@ -636,36 +747,46 @@ def parse_document_ai_response(document: documentai.Document, document_name: str
         req_id = req_entity.get("id")
         req_page = req_entity.get("page_number")
         
-        # Find compliance entities on the same page
-        for comp_entity in compliance_entities:
-            comp_page = comp_entity.get("page_number")
-            
-            # Link if on same page
-            if req_page == comp_page:
-                edges.append({
-                    "edge_id": f"edge_{edge_id_counter:03d}",
-                    "source": req_id,
-                    "source_type": "requirement",              # 2️⃣ Normalized type
-                    "target": comp_entity.get("id"),
-                    "target_type": "compliance",               # 2️⃣ Normalized type
-                    "relationship": "GOVERNED_BY",
-                    "relationship_type": "entity_to_entity",   # 2️⃣ Relationship type
-                    "confidence": 0.8,
-                    "page": req_page
-                })
-                edge_id_counter += 1
+        # Link to compliance entities on the same page (page index: sum of r_p * c_p, not R * C)
+        for comp_entity in compliance_entities_by_page.get(req_page, ()):
+            edge = {
+                "edge_id": _format_id(_EDGE_IDS, "edge_", edge_id_counter),
+                "source": req_id,
+                "source_type": "requirement",              # 2️⃣ Normalized type
+                "target": comp_entity.get("id"),
+                "target_type": "compliance",               # 2️⃣ Normalized type
+                "relationship": "GOVERNED_BY",
+                "relationship_type": "entity_to_entity",   # 2️⃣ Relationship type
+                "confidence": 0.8,
+                "page": req_page
+            }
+            edges.append(edge)
+            edges_by_page[req_page].append(edge)
+            edge_id_counter += 1
     
-    # Link detected requirements to detected compliance on same page
-    for chunk in chunks:
-        chunk_page = chunk.get("page_number")
-        detected_reqs = chunk.get("detected_requirements", [])
-        detected_comps = chunk.get("detected_compliance", [])
+    # Extract text chunks from pages
+    # 🚀 Single pass: build each page's chunk, its rule-based edges and trace_links together
+    for page_num, page in enumerate(pages, 1):
+        chunk = _build_page_chunk(
+            page, page_num, doc_text, document_name,
+            entities_by_page, requirement_entities_by_page, compliance_entities_by_page
+        )
+        if chunk is None:
+            continue
+        
+        detected_reqs = chunk.get("detected_requirements")
+        detected_comps = chunk.get("detected_compliance")
+        if detected_reqs:
+            total_detected_requirements += len(detected_reqs)
+        if detected_comps:
+            total_detected_compliance += len(detected_comps)
         
+        # Link detected requirements to detected compliance on same page
         if detected_reqs and detected_comps:
             for req in detected_reqs:
                 for comp in detected_comps:
-                    edges.append({
-                        "edge_id": f"edge_{edge_id_counter:03d}",
+                    edge = {
+                        "edge_id": _format_id(_EDGE_IDS, "edge_", edge_id_counter),
                         "source": req.get("id"),
                         "source_type": "detected_requirement",  # 2️⃣ Normalized type
                         "target": comp.get("canonical_id"),
@@ -673,26 +794,36 @@ def parse_document_ai_response(document: documentai.Document, document_name: str
                         "relationship": "REQUIRES_COMPLIANCE",
                         "relationship_type": "rule_based",      # 2️⃣ Relationship type
                         "confidence": 0.7,
-                        "page": chunk_page
-                    })
+                        "page": page_num
+                    }
+                    edges.append(edge)
+                    edges_by_page[page_num].append(edge)
                     edge_id_counter += 1
-    
-    # 3️⃣ Add trace_links to each chunk for same-page edges
-    for chunk in chunks:
-        chunk_page = chunk.get("page_number")
-        # Find all edges for this page
-        page_edges = [e for e in edges if e.get("page") == chunk_page]
+        
+        # 3️⃣ Add trace_links for same-page edges (page's edge list is complete at this point)
+        page_edges = edges_by_page.get(page_num)
         if page_edges:
             chunk["trace_links"] = page_edges
+        
+        chunks.append(chunk)
+    
+    # Calculate base metadata
+    total_pages = len(pages)
+    total_chunks = len(chunks)
+    text_length = len(doc_text) if doc_text else 0
+    
+    # Total entities = requirements + compliance only
+    total_detected_entities = total_detected_requirements + total_detected_compliance
     
-    # Build final response
+    # Build final response (one timestamp so document id and processed_at always agree)
+    now = datetime.now(timezone.utc)
     response = {
         "status": "success",
         "agent": "Document AI",
         "source_document": {
             "name": document_name,
-            "id": f"doc_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}",
-            "processed_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+            "id": f"doc_{now.strftime('%Y%m%d_%H%M%S')}",
+            "processed_at": now.isoformat(timespec="seconds")
         },
         "chunks": chunks,
         "edges": edges,  # 2️⃣ Enhanced traceability edges with normalized types
@@ -3,7 +3,272 @@ Knowledge Graph Module
 Handles knowledge graph construction and analysis
 """
 
-from typing import Dict, Any, List
+from collections import Counter, defaultdict
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+
+# 🚀 PERFORMANCE: Built once at import instead of on every KG build
+# Compliance normalization map (variations -> canonical ID)
+_COMPLIANCE_NORMALIZATION = {
+    "gdpr": "GDPR:2016/679",
+    "gdpr:2016/679": "GDPR:2016/679",
+    "general data protection regulation": "GDPR:2016/679",
+    "ccpa": "CCPA:2018",
+    "ccpa:2018": "CCPA:2018",
+    "california consumer privacy act": "CCPA:2018",
+    "hipaa": "HIPAA:1996",
+    "hipaa:1996": "HIPAA:1996",
+    "health insurance portability": "HIPAA:1996",
+    "fda": "FDA:21CFR11",
+    "fda 21 cfr part 11": "FDA:21CFR11",
+    "21 cfr part 11": "FDA:21CFR11",
+    "soc2": "SOC2:TypeII",
+    "soc 2": "SOC2:TypeII",
+    "iso27001": "ISO:27001",
+    "iso 27001": "ISO:27001"
+}
+
+# Standard type by canonical ID prefix (the part before ":")
+_STD_TYPE_BY_PREFIX = {
+    "GDPR": "GDPR",
+    "CCPA": "CCPA",
+    "HIPAA": "HIPAA",
+    "FDA": "FDA",
+    "SOC2": "SOC2",
+    "ISO": "ISO"
+}
+
+
+# Canonical compliance IDs (for the normalize_compliance_id fast path)
+_CANONICAL_COMPLIANCE_ID_SET = frozenset(_COMPLIANCE_NORMALIZATION.values())
+
+
+def normalize_compliance_id(raw_id: str) -> str:
+    """Normalize compliance ID to canonical form"""
+    if not raw_id:
+        return "UNKNOWN"
+    # 🚀 PERFORMANCE: Already-canonical IDs skip the lower()/strip() allocations
+    if raw_id in _CANONICAL_COMPLIANCE_ID_SET:
+        return raw_id
+    return _COMPLIANCE_NORMALIZATION.get(raw_id.lower().strip(), raw_id)
+
+
+def get_standard_type(canonical_id: str) -> str:
+    """
+    Determine the standard type (GDPR, CCPA, ...) from a canonical compliance ID
+
+    Args:
+        canonical_id: Canonical compliance ID (e.g. "GDPR:2016/679")
+
+    Returns:
+        Standard type, or "UNKNOWN" if no known prefix matches
+    """
+    standard_type = _STD_TYPE_BY_PREFIX.get(canonical_id.split(":", 1)[0])
+    if standard_type is not None:
+        return standard_type
+    # Fall back to a prefix scan for IDs like "ISO27001:2013" or "GDPR Article 5"
+    for prefix, standard_type in _STD_TYPE_BY_PREFIX.items():
+        if canonical_id.startswith(prefix):
+            return standard_type
+    return "UNKNOWN"
+
+
+# 🚀 PERFORMANCE: Node templates (key order == output key order); dict(template, ...)
+# copies the pre-built key table instead of inserting every key of a fresh literal
+_REQUIREMENT_NODE_TEMPLATE = {
+    "id": None,
+    "type": "REQUIREMENT",
+    "title": None,
+    "text": None,
+    "confidence": None,
+    "page_number": None,
+    "priority": None
+}
+_COMPLIANCE_NODE_TEMPLATE = {
+    "id": None,
+    "type": "COMPLIANCE_STANDARD",
+    "title": None,
+    "text": None,
+    "confidence": None,
+    "source": None,
+    "standard_type": None,
+    "page_number": None
+}
+_TEST_NODE_TEMPLATE = {
+    "id": None,
+    "type": "TEST_CASE",
+    "title": None,
+    "text": None,
+    "category": None,
+    "priority": None,
+    "confidence": 0.9  # High confidence for generated test cases
+}
+
+
+def _ensure_compliance_node(canonical_id: str, seen_compliance: Dict[str, str],
+                            text: str, confidence: float, source: str,
+                            page_number: int) -> Tuple[str, Optional[dict]]:
+    """
+    Create a COMPLIANCE_STANDARD node for canonical_id unless one already exists
+
+    Args:
+        canonical_id: Normalized compliance ID
+        seen_compliance: canonical_id -> KG node ID map (updated in place)
+        text: Node text for a newly created node
+        confidence: Node confidence for a newly created node
+        source: Where the standard was found (detected_compliance / chunk_relationships)
+        page_number: Page the standard was found on
+
+    Returns:
+        Tuple of (KG node ID, new node or None if the standard was already seen)
+    """
+    comp_kg_id = seen_compliance.get(canonical_id)
+    if comp_kg_id is not None:
+        return comp_kg_id, None
+
+    comp_kg_id = f"COMP_{len(seen_compliance) + 1:03d}"
+    seen_compliance[canonical_id] = comp_kg_id
+    return comp_kg_id, dict(
+        _COMPLIANCE_NODE_TEMPLATE,
+        id=comp_kg_id,
+        title=canonical_id,
+        text=text,
+        confidence=confidence,
+        source=source,
+        standard_type=get_standard_type(canonical_id),
+        page_number=page_number
+    )
+
+
+def iter_knowledge_graph_events(chunks: list, test_cases: list = None) -> Iterator[Tuple[str, dict]]:
+    """
+    🚀 Lazily emit knowledge graph nodes and edges from RAG chunks
+
+    Yields ("node", node) and ("edge", edge) tuples in the same order that
+    build_knowledge_graph_from_rag lists them, so callers that write the graph
+    to disk/network can stream it without holding every node and edge in memory.
+
+    Args:
+        chunks: RAG chunks (rag_output["chunks"] from /rag-enhance endpoint)
+        test_cases: Optional list of test cases to include in the graph
+
+    Yields:
+        (kind, obj) tuples where kind is "node" or "edge"
+    """
+    seen_requirements = set()
+    seen_compliance = {}  # canonical_id -> KG node ID
+    canonical_by_raw = {}  # 🚀 raw compliance ID -> canonical ID, normalized once per distinct ID
+    seen_test_cases = set()
+    edge_count = 0
+
+    # Process each chunk to extract nodes and relationships
+    for chunk in chunks:
+        page_number = chunk.get("page_number", 1)
+
+        # 1. Create REQUIREMENT nodes from detected_requirements
+        detected_requirements = chunk.get("detected_requirements", [])
+        for req_entity in detected_requirements:
+            req_id = req_entity.get("id")
+
+            if req_id and req_id not in seen_requirements:
+                req_text = req_entity.get("text", "")
+                req_node = dict(
+                    _REQUIREMENT_NODE_TEMPLATE,
+                    id=req_id,
+                    title=req_text[:100] + "..." if len(req_text) > 100 else req_text,
+                    text=req_text,
+                    confidence=req_entity.get("confidence", 0.0),
+                    page_number=page_number,
+                    priority="High" if "critical" in req_text.lower() else "Medium"
+                )
+                seen_requirements.add(req_id)
+                yield "node", req_node
+
+        # 2a. Create COMPLIANCE_STANDARD nodes from detected_compliance
+        detected_compliance = chunk.get("detected_compliance", [])
+        for comp_entity in detected_compliance:
+            comp_raw_id = comp_entity.get("id", comp_entity.get("standard", ""))
+            comp_canonical_id = canonical_by_raw.get(comp_raw_id)
+            if comp_canonical_id is None:
+                comp_canonical_id = canonical_by_raw[comp_raw_id] = normalize_compliance_id(comp_raw_id)
+            _, comp_node = _ensure_compliance_node(
+                comp_canonical_id, seen_compliance,
+                comp_entity.get("text", f"Compliance standard: {comp_canonical_id}"),
+                comp_entity.get("confidence", 0.8),
+                "detected_compliance",
+                page_number
+            )
+            if comp_node is not None:
+                yield "node", comp_node
+
+        # 2b + 3. Create COMPLIANCE_STANDARD nodes from relationship targets and
+        # connect requirements to them in a single pass over relationships[]
+        relationships = chunk.get("relationships", [])
+        for rel in relationships:
+            source_id = rel.get("source_id")
+            target_id = rel.get("target_id")
+            target_class = rel.get("target_class", "UNKNOWN")
+            confidence = rel.get("confidence", 0.7)
+
+            # Normalize target_id if it's a compliance standard
+            kg_target_id = target_id
+            if target_class == "COMPLIANCE_STANDARD" and target_id:
+                comp_canonical_id = canonical_by_raw.get(target_id)
+                if comp_canonical_id is None:
+                    comp_canonical_id = canonical_by_raw[target_id] = normalize_compliance_id(target_id)
+                kg_target_id, comp_node = _ensure_compliance_node(
+                    comp_canonical_id, seen_compliance,
+                    f"Compliance standard: {comp_canonical_id}",
+                    confidence,
+                    "chunk_relationships",
+                    page_number
+                )
+                if comp_node is not None:
+                    yield "node", comp_node
+
+            # Skip invalid relationships
+            if not source_id or not target_id:
+                continue
+
+            edge_count += 1
+            yield "edge", {
+                "id": rel.get("edge_id", f"edge_{edge_count:03d}"),
+                "from": source_id,
+                "to": kg_target_id,
+                "relation": rel.get("type", "RELATED"),
+                "confidence": confidence,
+                "source": "chunk_relationships",
+                "page": rel.get("page", page_number)
+            }
+
+    # Add test cases if provided
+    if test_cases:
+        for test_case in test_cases:
+            test_id = test_case.get("id", f"TC_{len(seen_test_cases) + 1:03d}")
+            if test_id not in seen_test_cases:
+                test_node = dict(
+                    _TEST_NODE_TEMPLATE,
+                    id=test_id,
+                    title=test_case.get("title", "Unknown Test"),
+                    text=test_case.get("description", ""),
+                    category=test_case.get("category", "Unknown"),
+                    priority=test_case.get("priority", "Medium")
+                )
+                seen_test_cases.add(test_id)
+                yield "node", test_node
+
+                # Create edges from test cases to requirements
+                derived_from = test_case.get("derived_from")
+                if derived_from and derived_from in seen_requirements:
+                    edge_count += 1
+                    yield "edge", {
+                        "id": f"edge_{edge_count:03d}",
+                        "from": test_id,
+                        "to": derived_from,
+                        "relation": "VERIFIED_BY",
+                        "confidence": 0.9,
+                        "source": "test_generation"
+                    }
 
 
 def build_knowledge_graph_from_rag(rag_output: dict, test_cases: list = None) -> dict:
@@ -17,6 +282,9 @@ def build_knowledge_graph_from_rag(rag_output: dict, test_cases: list = None) ->
     4. Normalizes compliance names using canonical IDs
     5. Adds comprehensive metadata (total_nodes, total_edges, avg_confidence, etc.)
 
+    Nodes and edges come from iter_knowledge_graph_events; use that directly to
+    stream a large graph instead of materializing it.
+
     Args:
         rag_output: RAG processing results with chunks (from /rag-enhance endpoint)
         test_cases: Optional list of test cases to include in the graph
@@ -37,248 +305,54 @@ def build_knowledge_graph_from_rag(rag_output: dict, test_cases: list = None) ->
                 "metadata": {}
             }
 
+        # 🚀 PERFORMANCE: Aggregate metadata while materializing the graph,
+        # so nodes and edges are each visited exactly once
         nodes = []
         edges = []
-        seen_requirements = set()
-        seen_compliance = {}  # canonical_id -> node_info
-        seen_test_cases = set()
-
-        # Compliance normalization map (variations -> canonical ID)
-        compliance_normalization = {
-            "gdpr": "GDPR:2016/679",
-            "gdpr:2016/679": "GDPR:2016/679",
-            "general data protection regulation": "GDPR:2016/679",
-            "ccpa": "CCPA:2018",
-            "ccpa:2018": "CCPA:2018",
-            "california consumer privacy act": "CCPA:2018",
-            "hipaa": "HIPAA:1996",
-            "hipaa:1996": "HIPAA:1996",
-            "health insurance portability": "HIPAA:1996",
-            "fda": "FDA:21CFR11",
-            "fda 21 cfr part 11": "FDA:21CFR11",
-            "21 cfr part 11": "FDA:21CFR11",
-            "soc2": "SOC2:TypeII",
-            "soc 2": "SOC2:TypeII",
-            "iso27001": "ISO:27001",
-            "iso 27001": "ISO:27001"
-        }
-
-        def normalize_compliance_id(raw_id: str) -> str:
-            """Normalize compliance ID to canonical form"""
-            if not raw_id:
-                return "UNKNOWN"
-            raw_lower = raw_id.lower().strip()
-            return compliance_normalization.get(raw_lower, raw_id)
-
-        # Process each chunk to extract nodes and relationships
-        for chunk in chunks:
-            page_number = chunk.get("page_number", 1)
-            chunk_id = chunk.get("chunk_id", "")
-            node_id = chunk.get("node_id", f"NODE_{chunk_id}")
-
-            # 1. Create REQUIREMENT nodes from detected_requirements
-            detected_requirements = chunk.get("detected_requirements", [])
-            for req_entity in detected_requirements:
-                req_id = req_entity.get("id")
-
-                if req_id and req_id not in seen_requirements:
-                    req_node = {
-                        "id": req_id,
-                        "type": "REQUIREMENT",
-                        "title": req_entity.get("text", "")[:100] + "..." if len(req_entity.get("text", "")) > 100 else req_entity.get("text", ""),
-                        "text": req_entity.get("text", ""),
-                        "confidence": req_entity.get("confidence", 0.0),
-                        "page_number": page_number,
-                        "priority": "High" if "critical" in req_entity.get("text", "").lower() else "Medium"
-                    }
-                    nodes.append(req_node)
-                    seen_requirements.add(req_id)
-
-            # 2a. Create COMPLIANCE_STANDARD nodes from detected_compliance
-            detected_compliance = chunk.get("detected_compliance", [])
-            for comp_entity in detected_compliance:
-                comp_raw_id = comp_entity.get("id", comp_entity.get("standard", ""))
-                comp_canonical_id = normalize_compliance_id(comp_raw_id)
-
-                if comp_canonical_id and comp_canonical_id not in seen_compliance:
-                    comp_kg_id = f"COMP_{len(seen_compliance) + 1:03d}"
-
-                    # Determine standard type from canonical ID
-                    standard_type = "UNKNOWN"
-                    if comp_canonical_id.startswith("GDPR"):
-                        standard_type = "GDPR"
-                    elif comp_canonical_id.startswith("CCPA"):
-                        standard_type = "CCPA"
-                    elif comp_canonical_id.startswith("HIPAA"):
-                        standard_type = "HIPAA"
-                    elif comp_canonical_id.startswith("FDA"):
-                        standard_type = "FDA"
-                    elif comp_canonical_id.startswith("SOC2"):
-                        standard_type = "SOC2"
-                    elif comp_canonical_id.startswith("ISO"):
-                        standard_type = "ISO"
-
-                    comp_node = {
-                        "id": comp_kg_id,
-                        "type": "COMPLIANCE_STANDARD",
-                        "title": comp_canonical_id,
-                        "text": comp_entity.get("text", f"Compliance standard: {comp_canonical_id}"),
-                        "confidence": comp_entity.get("confidence", 0.8),
-                        "source": "detected_compliance",
-                        "standard_type": standard_type,
-                        "page_number": page_number
-                    }
-                    nodes.append(comp_node)
-                    seen_compliance[comp_canonical_id] = comp_kg_id
-
-            # 2b. Create COMPLIANCE_STANDARD nodes from relationship targets
-            relationships = chunk.get("relationships", [])
-            for rel in relationships:
-                target_id = rel.get("target_id")
-                target_class = rel.get("target_class", "UNKNOWN")
-
-                if target_class == "COMPLIANCE_STANDARD" and target_id:
-                    comp_canonical_id = normalize_compliance_id(target_id)
-
-                    if comp_canonical_id not in seen_compliance:
-                        comp_kg_id = f"COMP_{len(seen_compliance) + 1:03d}"
-
-                        # Determine standard type from canonical ID
-                        standard_type = "UNKNOWN"
-                        if comp_canonical_id.startswith("GDPR"):
-                            standard_type = "GDPR"
-                        elif comp_canonical_id.startswith("CCPA"):
-                            standard_type = "CCPA"
-                        elif comp_canonical_id.startswith("HIPAA"):
-                            standard_type = "HIPAA"
-                        elif comp_canonical_id.startswith("FDA"):
-                            standard_type = "FDA"
-                        elif comp_canonical_id.startswith("SOC2"):
-                            standard_type = "SOC2"
-                        elif comp_canonical_id.startswith("ISO"):
-                            standard_type = "ISO"
-
-                        comp_node = {
-                            "id": comp_kg_id,
-                            "type": "COMPLIANCE_STANDARD",
-                            "title": comp_canonical_id,
-                            "text": f"Compliance standard: {comp_canonical_id}",
-                            "confidence": rel.get("confidence", 0.7),
-                            "source": "chunk_relationships",
-                            "standard_type": standard_type,
-                            "page_number": page_number
-                        }
-                        nodes.append(comp_node)
-                        seen_compliance[comp_canonical_id] = comp_kg_id
-
-            # 3. Use relationships[] to connect requirements to compliance nodes
-            for rel in relationships:
-                source_id = rel.get("source_id")
-                target_id = rel.get("target_id")
-                target_class = rel.get("target_class", "UNKNOWN")
-                rel_type = rel.get("type", "RELATED")
-                confidence = rel.get("confidence", 0.7)
-                edge_id = rel.get("edge_id", f"edge_{len(edges) + 1:03d}")
-
-                # Skip invalid relationships
-                if not source_id or not target_id:
-                    continue
-
-                # Normalize target_id if it's a compliance standard
-                if target_class == "COMPLIANCE_STANDARD":
-                    comp_canonical_id = normalize_compliance_id(target_id)
-                    kg_target_id = seen_compliance.get(comp_canonical_id, target_id)
-                else:
-                    kg_target_id = target_id
-
-                edge = {
-                    "id": edge_id,
-                    "from": source_id,
-                    "to": kg_target_id,
-                    "relation": rel_type,
-                    "confidence": confidence,
-                    "source": "chunk_relationships",
-                    "page": rel.get("page", page_number)
-                }
-                edges.append(edge)
-
-        # Add test cases if provided
-        if test_cases:
-            for test_case in test_cases:
-                test_id = test_case.get("id", f"TC_{len(seen_test_cases) + 1:03d}")
-                if test_id not in seen_test_cases:
-                    test_node = {
-                        "id": test_id,
-                        "id": test_id,
-                        "type": "TEST_CASE",
-                        "title": test_case.get("title", "Unknown Test"),
-                        "text": test_case.get("description", ""),
-                        "category": test_case.get("category", "Unknown"),
-                        "priority": test_case.get("priority", "Medium"),
-                        "confidence": 0.9  # High confidence for generated test cases
-                    }
-                    nodes.append(test_node)
-                    seen_test_cases.add(test_id)
-
-                    # Create edges from test cases to requirements
-                    derived_from = test_case.get("derived_from")
-                    if derived_from and derived_from in seen_requirements:
-                        edge = {
-                            "id": f"edge_{len(edges) + 1:03d}",
-                            "from": test_id,
-                            "to": derived_from,
-                            "relation": "VERIFIED_BY",
-                            "confidence": 0.9,
-                            "source": "test_generation"
-                        }
-                        edges.append(edge)
+        type_counts = Counter()
+        compliance_by_type = Counter()
+        pages_in_edges = set()
+        conf_sum = 0
+        edges_by_relation = Counter()
+        node_degrees = Counter()
+        for kind, obj in iter_knowledge_graph_events(chunks, test_cases):
+            if kind == "node":
+                nodes.append(obj)
+                node_type = obj["type"]
+                type_counts[node_type] += 1
+                if node_type == "COMPLIANCE_STANDARD":
+                    compliance_by_type[obj["standard_type"]] += 1
+            else:
+                edges.append(obj)
+                page = obj.get("page")  # Test case edges carry no page
+                if page:
+                    pages_in_edges.add(page)
+                conf_sum += obj["confidence"]
+                edges_by_relation[obj["relation"]] += 1
+                node_degrees[obj["from"]] += 1
+                node_degrees[obj["to"]] += 1
 
         # 4. Add comprehensive metadata at the end
         total_nodes = len(nodes)
         total_edges = len(edges)
-        requirement_count = len([n for n in nodes if n["type"] == "REQUIREMENT"])
-        compliance_count = len([n for n in nodes if n["type"] == "COMPLIANCE_STANDARD"])
-        test_count = len([n for n in nodes if n["type"] == "TEST_CASE"])
+        requirement_count = type_counts["REQUIREMENT"]
+        compliance_count = type_counts["COMPLIANCE_STANDARD"]
+        test_count = type_counts["TEST_CASE"]
 
-        # Calculate cross-page relationships (edges spanning multiple pages)
-        pages_in_edges = set(e.get("page") for e in edges if e.get("page"))
+        # Cross-page links: number of distinct pages the relationship edges were found on
+        # (tracked while materializing edges). Note this is not a count of edges whose
+        # endpoints sit on different pages; the name is kept for API compatibility.
         cross_page_links = len(pages_in_edges)
 
         # Calculate average confidence across all edges
-        avg_confidence = round(
-            sum(e.get("confidence", 0.0) for e in edges) / max(1, total_edges),
-            2
-        ) if edges else 0.0
+        avg_confidence = round(conf_sum / total_edges, 2) if edges else 0.0
 
         # Calculate graph density (edges per node ratio)
         graph_density = round(total_edges / max(1, total_nodes), 2)
 
-        # Count compliance standards by type
-        compliance_by_type = {}
-        for node in nodes:
-            if node["type"] == "COMPLIANCE_STANDARD":
-                std_type = node.get("standard_type", "UNKNOWN")
-                compliance_by_type[std_type] = compliance_by_type.get(std_type, 0) + 1
-
-        # Count edges by relation type
-        edges_by_relation = {}
-        for edge in edges:
-            rel_type = edge.get("relation", "UNKNOWN")
-            edges_by_relation[rel_type] = edges_by_relation.get(rel_type, 0) + 1
-
         # Find nodes with most connections (high-degree nodes)
-        node_degrees = {}
-        for edge in edges:
-            source = edge.get("from")
-            target = edge.get("to")
-            node_degrees[source] = node_degrees.get(source, 0) + 1
-            node_degrees[target] = node_degrees.get(target, 0) + 1
-
-        top_connected_nodes = sorted(
-            node_degrees.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]  # Top 5 most connected nodes
+        # 🚀 PERFORMANCE: Heap-based partial sort (ties keep first-seen order)
+        top_connected_nodes = node_degrees.most_common(5)  # Top 5 most connected nodes
 
         return {
             "status": "success",
@@ -300,7 +374,7 @@ def build_knowledge_graph_from_rag(rag_output: dict, test_cases: list = None) ->
                     {"node_id": node_id, "connections": count}
                     for node_id, count in top_connected_nodes
                 ],
-                "normalized_compliance_count": len(seen_compliance),
+                "normalized_compliance_count": compliance_count,  # One node per canonical ID
                 "tooltips": []
             }
         }
@@ -442,6 +516,14 @@ def create_flow_visualization(ui_result: dict, kg_result: dict) -> dict:
         kg_edges = kg_result.get("edges", [])
         test_categories = ui_result.get("test_categories", [])
 
+        # 🚀 PERFORMANCE: Index nodes by ID and edges by source once (O(1) lookups below)
+        kg_nodes_by_id = {}
+        for node in kg_nodes:
+            kg_nodes_by_id.setdefault(node["id"], node)  # First node wins, like the old linear scan
+        edges_by_source = defaultdict(list)
+        for edge in kg_edges:
+            edges_by_source[edge.get("from")].append(edge)
+
         # Build flow paths: Requirement → Test → Compliance
         flow_paths = []
         requirement_coverage = {}
@@ -479,12 +561,12 @@ def create_flow_visualization(ui_result: dict, kg_result: dict) -> dict:
 
                 # Fallback: If kg_mapping doesn't have edges, get them directly from KG
                 if not kg_edges_for_req and req_id:
-                    kg_edges_for_req = [e for e in kg_edges if e.get("from") == req_id]
+                    kg_edges_for_req = edges_by_source.get(req_id, [])
 
                 for kg_edge in kg_edges_for_req:
                     # Handle both kg_mapping format and direct KG edge format
                     target_id = kg_edge.get("to") or kg_edge.get("target_id")
-                    compliance_std = next((n for n in kg_nodes if n["id"] == target_id), None)
+                    compliance_std = kg_nodes_by_id.get(target_id)
 
                     if compliance_std and compliance_std.get("type") == "COMPLIANCE_STANDARD":
                         std_id = compliance_std["id"]
@@ -564,15 +646,13 @@ def create_flow_visualization(ui_result: dict, kg_result: dict) -> dict:
                     for tc in req_data["test_cases"]
                 ] + [
                     {
-                        "from": tc["test_id"],
+                        "from": tc_id,
                         "to": f"std_{std_id}",
                         "type": "ensures_compliance",
                         "label": "ensures"
                     }
                     for std_id, std_data in compliance_coverage.items()
                     for tc_id in std_data["test_cases"]
-                    for tc in all_test_cases
-                    if tc["test_id"] == tc_id
                 ]
             }
         }
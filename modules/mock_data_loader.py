@@ -3,10 +3,16 @@ Mock Data Loader Module
 Provides utilities for loading mock data from the mockData directory
 """
 
-import json
 import os
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 
+import orjson
+
+# 🚀 PERFORMANCE: Resolve the mockData root once at import instead of per load
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MOCK_ROOT = os.path.join(_PROJECT_ROOT, "mockData")
+
 
 def get_mock_data_path(subdirectory: str, filename: str) -> str:
     """
@@ -19,9 +25,19 @@ def get_mock_data_path(subdirectory: str, filename: str) -> str:
     Returns:
         Full path to the mock data file
     """
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(current_dir)
-    return os.path.join(project_root, "mockData", subdirectory, filename)
+    return os.path.join(_MOCK_ROOT, subdirectory, filename)
+
+
+@lru_cache(maxsize=None)
+def _read_mock_file(file_path: str) -> bytes:
+    """
+    🚀 PERFORMANCE: Read a mock data file once and keep its raw contents
+
+    Only the raw bytes are cached: callers mutate the loaded data (e.g. timestamps),
+    so every load still parses a fresh object. Missing files raise and are not cached.
+    """
+    with open(file_path, 'rb') as f:
+        return f.read()
 
 
 def load_json_mock_data(subdirectory: str, filename: str, fallback_data: Optional[Dict] = None) -> Dict:
@@ -39,14 +55,13 @@ def load_json_mock_data(subdirectory: str, filename: str, fallback_data: Optiona
     file_path = get_mock_data_path(subdirectory, filename)
     
     try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        return orjson.loads(_read_mock_file(file_path))  # 🚀 orjson parses bytes directly
     except FileNotFoundError:
         print(f"⚠️  Mock data file not found at {file_path}")
         if fallback_data:
             return fallback_data
         return {}
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         print(f"⚠️  Error parsing mock data file {file_path}: {e}")
         if fallback_data:
             return fallback_data
@@ -68,14 +83,13 @@ def load_json_list_mock_data(subdirectory: str, filename: str, fallback_data: Op
     file_path = get_mock_data_path(subdirectory, filename)
     
     try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        return orjson.loads(_read_mock_file(file_path))  # 🚀 orjson parses bytes directly
     except FileNotFoundError:
         print(f"⚠️  Mock data file not found at {file_path}")
         if fallback_data:
             return fallback_data
         return []
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         print(f"⚠️  Error parsing mock data file {file_path}: {e}")
         if fallback_data:
             return fallback_data
@@ -4,15 +4,82 @@ Handles RAG corpus queries and context enhancement
 """
 
 import os
+import time
 import asyncio
+import hashlib
+import itertools
+import logging
+import sqlite3
 import threading
-from typing import Dict, Any
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import orjson
+import re2
 from vertexai.preview import rag
 
+logger = logging.getLogger(__name__)
+
 
 # 🚀 PERFORMANCE CACHE: Global cache for RAG tools
 _rag_tool_cache = {}
-_rag_tool_lock = threading.Lock()
+# Per-key locks (created under the short-lived meta lock) so only threads racing on
+# the same corpus wait for each other while its configuration is validated
+_rag_tool_key_locks: Dict[str, threading.Lock] = {}
+_rag_tool_meta_lock = threading.Lock()
+
+# 🚀 PERFORMANCE: Dedicated, bounded pool for blocking rag.retrieval_query() calls so
+# RAG fan-out is capped (tunable to Vertex quota) and never starves the default executor
+RAG_CONCURRENCY = int(os.getenv("RAG_CONCURRENCY", "16"))
+_rag_executor = ThreadPoolExecutor(max_workers=RAG_CONCURRENCY, thread_name_prefix="rag")
+
+# Opt-in: skip RAG retrieval for chunks with no requirements, compliance or policy
+# keywords (RAG_PREFILTER=on). Off by default — the keyword list is the offline
+# fallback's, not the corpus contents, so skipping can lose corpus matches
+RAG_PREFILTER = os.getenv("RAG_PREFILTER", "off").lower() == "on"
+
+# 🚀 PERFORMANCE CACHE: TTL'd LRU of retrieval results keyed by
+# (corpus, blake2b(chunk text), top_k, threshold) so repeated chunk texts
+# (boilerplate headers/footers, re-processed documents) skip the Vertex round-trip
+_RAG_RESULT_CACHE_SIZE = 4096
+_RAG_RESULT_CACHE_TTL = 3600  # seconds
+_rag_result_cache = OrderedDict()  # key -> (expires_at, matched_policies)
+_rag_result_cache_lock = threading.Lock()  # Guards the dict only, never held across I/O
+# In-flight retrievals per key: concurrent misses on the same text wait on one Future
+# instead of all querying Vertex. The lock only guards the dict (never held across
+# the RPC), so misses on different texts never wait for each other
+_rag_result_inflight: Dict[tuple, Future] = {}
+_rag_result_inflight_lock = threading.Lock()
+
+# 🚀 PERFORMANCE CACHE: Optional on-disk layer under the in-memory cache (SQLite in WAL
+# mode with mmap reads) so retrieval results survive restarts and are shared by all
+# workers on the host. Disabled unless RAG_CACHE_DIR is set.
+_RAG_DISK_CACHE_DIR = os.getenv("RAG_CACHE_DIR")
+_RAG_DISK_CACHE_TTL = 86400  # seconds
+_RAG_DISK_CACHE_SIZE = 65536  # max rows; oldest-written rows are evicted first
+_RAG_DISK_CACHE_PRUNE_EVERY = 256  # writes between expiry/size pruning passes
+_rag_disk_cache_writes = itertools.count(1)
+_rag_disk_cache_local = threading.local()  # SQLite connections are per-thread
+
+
+@dataclass(frozen=True, slots=True)
+class RagConfig:
+    """
+    Validated RAG corpus configuration shared by every chunk of a request
+
+    🚀 PERFORMANCE: Frozen slotted dataclass — per-chunk field access is a slot
+    fetch instead of a dict lookup, and the corpus name is validated once here
+    """
+    project_id: str
+    corpus_name: str
+    location: str
+
+    def __post_init__(self):
+        if not self.corpus_name:
+            raise ValueError("RAG corpus name not found in configuration")
 
 
 def get_cached_rag_tool(project_id: str, rag_corpus_name: str, rag_location: str):
@@ -24,157 +91,391 @@ def get_cached_rag_tool(project_id: str, rag_corpus_name: str, rag_location: str
     """
     cache_key = f"{project_id}_{rag_corpus_name}_{rag_location}"
 
-    with _rag_tool_lock:
-        if cache_key in _rag_tool_cache:
-            print(f"🔄 Using cached RAG configuration for corpus")
-            return _rag_tool_cache[cache_key]
+    # Fast path: lock-free read of an already cached configuration
+    rag_config = _rag_tool_cache.get(cache_key)
+    if rag_config is not None:
+        # Hit on every request: lazy debug log instead of print()
+        logger.debug("🔄 Using cached RAG configuration for corpus %s", rag_corpus_name)
+        return rag_config
+
+    with _rag_tool_meta_lock:
+        key_lock = _rag_tool_key_locks.setdefault(cache_key, threading.Lock())
+
+    created = False
+    error = None
+    with key_lock:
+        # Re-check: another thread may have cached this corpus while we waited
+        rag_config = _rag_tool_cache.get(cache_key)
+        if rag_config is None:
+            try:
+                # Store corpus configuration (not a tool object); validated on construction
+                rag_config = RagConfig(
+                    project_id=project_id,
+                    corpus_name=rag_corpus_name,
+                    location=rag_location
+                )
+
+                # Cache the configuration
+                _rag_tool_cache[cache_key] = rag_config
+                created = True
+
+            except Exception as e:
+                error = e
+
+    # Log outside the lock so stdout I/O never serializes other threads
+    if error is not None:
+        print(f"❌ Failed to cache RAG configuration: {str(error)}")
+        return None
+    if created:
+        print(f"✅ RAG corpus configuration cached successfully")
+    else:
+        logger.debug("🔄 Using cached RAG configuration for corpus %s", rag_corpus_name)
+    return rag_config
+
+
+def _extract_matched_policies(rag_response) -> list:
+    """
+    Extract matched policies from a rag.retrieval_query() response
 
-        try:
-            print(f"🆕 Validating RAG corpus configuration...")
-
-            # Validate corpus exists by attempting a test query
-            # Store corpus configuration as a dict (not a tool object)
-            rag_config = {
-                "project_id": project_id,
-                "corpus_name": rag_corpus_name,
-                "location": rag_location
-            }
+    Args:
+        rag_response: RetrieveContextsResponse from the Vertex AI RAG API
 
-            # Cache the configuration
-            _rag_tool_cache[cache_key] = rag_config
-            print(f"✅ RAG corpus configuration cached successfully")
-            return rag_config
+    Returns:
+        List of matched policy dicts (policy_name, policy_text, similarity_score, source, distance)
+    """
+    matched_policies = []
+    # 🚀 PERFORMANCE: getattr with defaults instead of hasattr + re-fetch per attribute
+    contexts = getattr(rag_response, 'contexts', None)
+    if contexts:
+        # Response may have nested contexts
+        contexts_list = getattr(contexts, 'contexts', contexts)
+
+        for context in contexts_list:
+            # Extract text and metadata
+            context_text = getattr(context, 'text', "")
+            context_source = getattr(context, 'source_uri', "")
+            distance = getattr(context, 'distance', 0.0)
+
+            # Calculate similarity score from distance (lower distance = higher similarity)
+            similarity_score = max(0.0, 1.0 - distance)
+
+            if context_text:
+                matched_policies.append({
+                    "policy_name": context_source.rpartition('/')[2] if context_source else 'RAG Policy',
+                    "policy_text": context_text[:200] + "..." if len(context_text) > 200 else context_text,
+                    "similarity_score": round(similarity_score, 2),
+                    "source": "rag_corpus",
+                    "distance": round(distance, 3)
+                })
 
-        except Exception as e:
-            print(f"❌ Failed to cache RAG configuration: {str(e)}")
+    return matched_policies
+
+
+def _get_cached_rag_result(key: tuple):
+    """Return cached matched policies for key (fresh copies), or None on miss/expiry"""
+    with _rag_result_cache_lock:
+        entry = _rag_result_cache.get(key)
+        if entry is None:
             return None
+        expires_at, matched_policies = entry
+        if expires_at < time.monotonic():
+            del _rag_result_cache[key]
+            return None
+        _rag_result_cache.move_to_end(key)
+    # Copy so callers can't mutate the cached entry
+    return [dict(policy) for policy in matched_policies]
+
+
+def _store_rag_result(key: tuple, matched_policies: list) -> None:
+    """Cache matched policies for key, evicting the least recently used entries"""
+    entry = (time.monotonic() + _RAG_RESULT_CACHE_TTL, [dict(policy) for policy in matched_policies])
+    with _rag_result_cache_lock:
+        _rag_result_cache[key] = entry
+        _rag_result_cache.move_to_end(key)
+        while len(_rag_result_cache) > _RAG_RESULT_CACHE_SIZE:
+            _rag_result_cache.popitem(last=False)
+
+
+def _rag_disk_cache_connection():
+    """Return this thread's connection to the on-disk result cache, or None if disabled"""
+    if not _RAG_DISK_CACHE_DIR:
+        return None
+    conn = getattr(_rag_disk_cache_local, "conn", None)
+    if conn is None:
+        os.makedirs(_RAG_DISK_CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(_RAG_DISK_CACHE_DIR, "rag_results.sqlite3"), timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rag_results "
+            "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, matched_policies BLOB NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS rag_results_expires_at ON rag_results (expires_at)")
+        _prune_disk_rag_cache(conn)
+        _rag_disk_cache_local.conn = conn
+    return conn
+
+
+def _prune_disk_rag_cache(conn: sqlite3.Connection) -> None:
+    """Delete expired rows, then evict the oldest rows beyond _RAG_DISK_CACHE_SIZE"""
+    with conn:
+        conn.execute("DELETE FROM rag_results WHERE expires_at <= ?", (time.time(),))
+        # TTL is fixed, so the earliest expiry is the oldest write
+        conn.execute(
+            "DELETE FROM rag_results WHERE key IN "
+            "(SELECT key FROM rag_results ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (_RAG_DISK_CACHE_SIZE,)
+        )
 
 
-async def process_chunk_with_rag(chunk: dict, rag_config: dict, doc_counter: int) -> dict:
+def _rag_disk_cache_key(key: tuple) -> str:
+    corpus_name, text_digest, similarity_top_k, vector_distance_threshold = key
+    return f"{corpus_name}|{text_digest.hex()}|{similarity_top_k}|{vector_distance_threshold}"
+
+
+def _load_disk_rag_result(key: tuple):
+    """Return matched policies from the on-disk cache, or None on miss/expiry/error"""
+    try:
+        conn = _rag_disk_cache_connection()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT matched_policies FROM rag_results WHERE key = ? AND expires_at > ?",
+            (_rag_disk_cache_key(key), time.time())
+        ).fetchone()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("RAG disk cache read failed: %s", e)
+        return None
+    return orjson.loads(row[0]) if row else None
+
+
+def _store_disk_rag_result(key: tuple, matched_policies: list) -> None:
+    """Persist matched policies to the on-disk cache (best effort)"""
+    try:
+        conn = _rag_disk_cache_connection()
+        if conn is None:
+            return
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO rag_results (key, expires_at, matched_policies) VALUES (?, ?, ?)",
+                (_rag_disk_cache_key(key), time.time() + _RAG_DISK_CACHE_TTL, orjson.dumps(matched_policies))
+            )
+        # Bound the file: prune expired/excess rows at a fixed write interval, not per write
+        if next(_rag_disk_cache_writes) % _RAG_DISK_CACHE_PRUNE_EVERY == 0:
+            _prune_disk_rag_cache(conn)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("RAG disk cache write failed: %s", e)
+
+
+def _retrieve_matched_policies(chunk_text: str, corpus_name: str) -> list:
+    """
+    Run one RAG retrieval for chunk_text and parse the matched policies
+
+    Blocking (network I/O); runs on _rag_executor so the response is parsed
+    in the worker thread too, not on the event loop. Results are cached per
+    (corpus, chunk text hash, top_k, threshold) in memory and, when RAG_CACHE_DIR
+    is set, on disk; failed retrievals are not cached (threads already waiting on
+    the failed retrieval get its exception, later calls retry).
+    """
+    # Dynamic thresholding based on chunk length
+    # Note: Lower threshold = stricter matching. Increase for broader matches.
+    similarity_top_k = 3
+    vector_distance_threshold = 0.6 if len(chunk_text) < 500 else 0.5  # Relaxed for better coverage
+
+    key = (
+        corpus_name,
+        hashlib.blake2b(chunk_text.encode(), digest_size=16).digest(),
+        similarity_top_k,
+        vector_distance_threshold
+    )
+    matched_policies = _get_cached_rag_result(key)
+    if matched_policies is not None:
+        return matched_policies
+
+    with _rag_result_inflight_lock:
+        # Re-check: the previous owner caches its result before leaving the in-flight map
+        matched_policies = _get_cached_rag_result(key)
+        if matched_policies is not None:
+            return matched_policies
+        retrieval = _rag_result_inflight.get(key)
+        owner = retrieval is None
+        if owner:
+            retrieval = _rag_result_inflight[key] = Future()
+
+    if not owner:
+        # Another thread is retrieving this key; share its result (or its failure)
+        return [dict(policy) for policy in retrieval.result()]
+
+    try:
+        matched_policies = _load_disk_rag_result(key)
+        if matched_policies is None:
+            rag_response = rag.retrieval_query(
+                text=chunk_text,
+                rag_corpora=[corpus_name],
+                similarity_top_k=similarity_top_k,
+                vector_distance_threshold=vector_distance_threshold
+            )
+            matched_policies = _extract_matched_policies(rag_response)
+            _store_disk_rag_result(key, matched_policies)
+        _store_rag_result(key, matched_policies)
+        retrieval.set_result([dict(policy) for policy in matched_policies])
+        return matched_policies
+    except BaseException as e:
+        retrieval.set_exception(e)
+        raise
+    finally:
+        with _rag_result_inflight_lock:
+            del _rag_result_inflight[key]
+
+
+def _rag_chunk_result(chunk: dict, chunk_text: str, matched_policies: list, rag_response: str) -> dict:
+    """
+    Build the per-chunk RAG result (shared by the success, skip, error and fallback paths)
+
+    Args:
+        chunk: Source chunk from DLP masking
+        chunk_text: Masked text that was (or would have been) sent to the RAG corpus
+        matched_policies: Policies matched for the chunk
+        rag_response: Status message for the chunk
+
+    Returns:
+        Context doc dict consumed by knowledge graph and test generation
+    """
+    return {
+        "chunk_id": chunk.get("chunk_id"),
+        "page_number": chunk.get("page_number", 1),
+        "text": chunk_text,  # This is masked_text for RAG queries
+        "original_text": chunk.get("original_text", chunk_text),  # 🚀 Pass original for Gemini
+        "requirement_entities": chunk.get("detected_requirements", chunk.get("requirement_entities", [])),
+        "compliance_entities": chunk.get("detected_compliance", chunk.get("compliance_entities", [])),
+        "matched_policies": matched_policies,
+        "bounding_box": chunk.get("bounding_box", {}),
+        "source_type": "prd_document",
+        "pii_found": chunk.get("pii_found", False),
+        "pii_types": chunk.get("pii_types", []),
+        "rag_response": rag_response
+    }
+
+
+async def process_chunk_with_rag(chunk: dict, rag_config: RagConfig, doc_counter: int,
+                                 inflight_retrievals: Optional[Dict[str, asyncio.Future]] = None) -> dict:
     """
     Process a single chunk with RAG using new rag.retrieval_query() API
 
     Args:
         chunk: Chunk dictionary with text to query
-        rag_config: RAG configuration dict with corpus_name, project_id, location
+        rag_config: Validated RAG corpus configuration
         doc_counter: Counter for logging
+        inflight_retrievals: Optional chunk text -> retrieval future map shared by the
+            chunks of one document, so identical texts are retrieved only once
     """
+    # Bound once up front so the error path reuses it
+    chunk_text = chunk.get("masked_text", chunk.get("text", ""))
     try:
         # Debug: Check what's in the chunk
         chunk_id = chunk.get("chunk_id", "unknown")
         detected_reqs = chunk.get("detected_requirements", [])
         detected_comp = chunk.get("detected_compliance", [])
-        print(f"📦 RAG processing {chunk_id}: {len(detected_reqs)} requirements, {len(detected_comp)} compliance")
+        # 🚀 PERFORMANCE: Lazy debug logging instead of per-chunk print() (no f-string
+        # build and no stdout lock contention across concurrent chunks)
+        logger.debug("📦 RAG processing %s: %d requirements, %d compliance",
+                     chunk_id, len(detected_reqs), len(detected_comp))
 
-        chunk_text = chunk.get("masked_text", chunk.get("text", ""))
         if not chunk_text.strip():
-            return {
-                "chunk_id": chunk.get("chunk_id"),
-                "text": chunk_text,
-                "original_text": chunk.get("original_text", chunk_text),  # 🚀 Pass original for Gemini
-                "requirement_entities": chunk.get("requirement_entities", []),
-                "compliance_entities": chunk.get("compliance_entities", []),
-                "matched_policies": [],
-                "bounding_box": chunk.get("bounding_box", {}),
-                "source_type": "prd_document",
-                "pii_found": chunk.get("pii_found", False),
-                "pii_types": chunk.get("pii_types", []),
-                "rag_response": "No text to process"
-            }
-
-        # Dynamic thresholding based on chunk length
-        # Note: Lower threshold = stricter matching. Increase for broader matches.
-        similarity_top_k = 3
-        vector_distance_threshold = 0.6 if len(chunk_text) < 500 else 0.5  # Relaxed for better coverage
-
-        # Extract corpus name and validate
-        corpus_name = rag_config.get("corpus_name")
-        if not corpus_name:
-            raise ValueError("RAG corpus name not found in configuration")
-
-        # 🚀 NEW API: Use rag.retrieval_query() directly
-        print(f"🔍 Querying RAG corpus: {corpus_name}")
-        rag_response = await asyncio.to_thread(
-            rag.retrieval_query,
-            text=chunk_text,
-            rag_corpora=[corpus_name],
-            similarity_top_k=similarity_top_k,
-            vector_distance_threshold=vector_distance_threshold
-        )
-
-        # Extract matched policies from new RAG response format
-        matched_policies = []
-        if hasattr(rag_response, 'contexts') and rag_response.contexts:
-            if hasattr(rag_response.contexts, 'contexts'):
-                # Response has nested contexts
-                contexts_list = rag_response.contexts.contexts
+            return _rag_chunk_result(chunk, chunk_text, [], "No text to process")
+
+        corpus_name = rag_config.corpus_name
+
+        # 🚀 PERFORMANCE: Optional pre-filter — when enabled, a chunk with no detected
+        # requirements/compliance and no fallback policy keyword skips its RAG call
+        if (
+            RAG_PREFILTER
+            and not detected_reqs
+            and not detected_comp
+            and not _POLICY_KEYWORD_SET.Match(chunk_text.lower())
+        ):
+            matched_policies = []
+            rag_response = "RAG query skipped (no requirements, compliance or policy keywords)"
+        else:
+            # 🚀 NEW API: Use rag.retrieval_query() directly
+            logger.debug("🔍 Querying RAG corpus: %s", corpus_name)
+            if inflight_retrievals is None:
+                matched_policies = await asyncio.get_running_loop().run_in_executor(
+                    _rag_executor, _retrieve_matched_policies, chunk_text, corpus_name
+                )
             else:
-                contexts_list = rag_response.contexts
-
-            for context in contexts_list:
-                # Extract text and metadata
-                context_text = ""
-                context_source = ""
-                distance = 0.0
-
-                if hasattr(context, 'text'):
-                    context_text = context.text
-                if hasattr(context, 'source_uri'):
-                    context_source = context.source_uri
-                if hasattr(context, 'distance'):
-                    distance = context.distance
-
-                # Calculate similarity score from distance (lower distance = higher similarity)
-                similarity_score = max(0.0, 1.0 - distance)
-
-                if context_text:
-                    matched_policies.append({
-                        "policy_name": context_source.split('/')[-1] if context_source else 'RAG Policy',
-                        "policy_text": context_text[:200] + "..." if len(context_text) > 200 else context_text,
-                        "similarity_score": round(similarity_score, 2),
-                        "source": "rag_corpus",
-                        "distance": round(distance, 3)
-                    })
-
-        result = {
-            "chunk_id": chunk.get("chunk_id"),
-            "page_number": chunk.get("page_number", 1),
-            "text": chunk_text,  # This is masked_text for RAG queries
-            "original_text": chunk.get("original_text", chunk_text),  # 🚀 Pass original for Gemini
-            "requirement_entities": chunk.get("detected_requirements", chunk.get("requirement_entities", [])),
-            "compliance_entities": chunk.get("detected_compliance", chunk.get("compliance_entities", [])),
-            "matched_policies": matched_policies,
-            "bounding_box": chunk.get("bounding_box", {}),
-            "source_type": "prd_document",
-            "pii_found": chunk.get("pii_found", False),
-            "pii_types": chunk.get("pii_types", []),
-            "rag_response": "RAG query successful"
-        }
+                # 🚀 PERFORMANCE: Repeated boilerplate (headers, footers, table cells) shares
+                # one retrieval instead of each copy occupying a RAG pool worker
+                retrieval = inflight_retrievals.get(chunk_text)
+                if retrieval is None:
+                    retrieval = asyncio.get_running_loop().run_in_executor(
+                        _rag_executor, _retrieve_matched_policies, chunk_text, corpus_name
+                    )
+                    inflight_retrievals[chunk_text] = retrieval
+                # Shield so cancelling one waiter doesn't cancel the shared retrieval;
+                # copy so sibling chunks never alias the same policy dicts
+                matched_policies = [dict(p) for p in await asyncio.shield(retrieval)]
+            rag_response = "RAG query successful"
+
+        result = _rag_chunk_result(chunk, chunk_text, matched_policies, rag_response)
 
         # Debug: Verify what we're returning
-        print(f"✅ {chunk_id} matched {len(matched_policies)} policies from RAG corpus")
+        logger.debug("✅ %s matched %d policies from RAG corpus", chunk_id, len(matched_policies))
 
         return result
 
     except Exception as e:
         print(f"⚠️  RAG processing error for chunk {chunk.get('chunk_id', 'unknown')}: {str(e)}")
-        import traceback
-        print(f"📋 Error trace: {traceback.format_exc()}")
-        chunk_text = chunk.get("masked_text", chunk.get("text", ""))
-        return {
-            "chunk_id": chunk.get("chunk_id"),
-            "page_number": chunk.get("page_number", 1),
-            "text": chunk_text,
-            "original_text": chunk.get("original_text", chunk_text),  # 🚀 Pass original for Gemini
-            "requirement_entities": chunk.get("detected_requirements", chunk.get("requirement_entities", [])),
-            "compliance_entities": chunk.get("detected_compliance", chunk.get("compliance_entities", [])),
-            "matched_policies": [],
-            "bounding_box": chunk.get("bounding_box", {}),
-            "source_type": "prd_document",
-            "pii_found": chunk.get("pii_found", False),
-            "pii_types": chunk.get("pii_types", []),
-            "rag_response": f"Error: {str(e)}"
-        }
+        # 🚀 PERFORMANCE: Only format the stack when debugging — during an outage every
+        # chunk fails, and formatting each traceback is far costlier than the error itself
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📋 Error trace", exc_info=True)
+        return _rag_chunk_result(chunk, chunk_text, [], f"Error: {str(e)}")
+
+
+async def stream_rag_from_chunks(chunks: list, rag_config: RagConfig) -> AsyncIterator[Tuple[int, dict]]:
+    """
+    🚀 Query RAG for all chunks concurrently, yielding each result as soon as it completes
+
+    Lets consumers start on early chunks instead of waiting for the slowest retrieval.
+    Results arrive in completion order, so each is paired with its chunk index.
+
+    Args:
+        chunks: DLP-masked chunks
+        rag_config: Validated RAG corpus configuration
+
+    Yields:
+        (chunk index, context doc) tuples
+    """
+    inflight_retrievals: Dict[str, asyncio.Future] = {}
+
+    async def run(i: int, chunk: dict) -> Tuple[int, Any]:
+        try:
+            return i, await process_chunk_with_rag(chunk, rag_config, i, inflight_retrievals)
+        except Exception as e:
+            return i, e
+
+    # 🚀 PERFORMANCE: Longest-processing-time first — start the longest chunks first so
+    # they don't queue behind short ones on the bounded RAG pool and straggle at the end
+    order = sorted(
+        range(len(chunks)),
+        key=lambda i: -len(chunks[i].get("masked_text", chunks[i].get("text", "")) or "")
+    )
+    tasks = [asyncio.ensure_future(run(i, chunks[i])) for i in order]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            i, result = await next_done
+            if isinstance(result, Exception):
+                print(f"⚠️  RAG chunk processing error for chunk {i}: {str(result)}")
+                # Create a fallback result for failed chunks
+                chunk = chunks[i]
+                chunk_text = chunk.get("masked_text", chunk.get("text", ""))
+                result = _rag_chunk_result(chunk, chunk_text, [], f"Error: {str(result)}")
+            yield i, result
+    finally:
+        # Consumer stopped early (or failed): don't leave retrievals running
+        for task in tasks:
+            task.cancel()
 
 
 async def query_rag_from_chunks(dlp_output: dict, project_id: str, rag_corpus_name: str = None, rag_location: str = "europe-west3") -> dict:
@@ -204,39 +505,17 @@ async def query_rag_from_chunks(dlp_output: dict, project_id: str, rag_corpus_na
                 "context_docs": []
             }
 
-        # Process chunks with RAG concurrently for better performance
-        tasks = [process_chunk_with_rag(chunk, rag_config, i) for i, chunk in enumerate(chunks)]
-        context_docs = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Handle any exceptions from concurrent processing
-        processed_docs = []
-        for i, result in enumerate(context_docs):
-            if isinstance(result, Exception):
-                print(f"⚠️  RAG chunk processing error for chunk {i}: {str(result)}")
-                # Create a fallback result for failed chunks
-                chunk = chunks[i]
-                chunk_text = chunk.get("masked_text", chunk.get("text", ""))
-                processed_docs.append({
-                    "chunk_id": chunk.get("chunk_id"),
-                    "text": chunk_text,
-                    "original_text": chunk.get("original_text", chunk_text),  # 🚀 Pass original for Gemini
-                    "requirement_entities": chunk.get("requirement_entities", []),
-                    "compliance_entities": chunk.get("compliance_entities", []),
-                    "matched_policies": [],
-                    "bounding_box": chunk.get("bounding_box", {}),
-                    "source_type": "prd_document",
-                    "pii_found": chunk.get("pii_found", False),
-                    "pii_types": chunk.get("pii_types", []),
-                    "rag_response": f"Error: {str(result)}"
-                })
-            else:
-                processed_docs.append(result)
-        
-        context_docs = processed_docs
-
-        # Calculate statistics
-        total_policies = sum(len(doc.get("matched_policies", [])) for doc in context_docs)
-        chunks_with_policies = len([doc for doc in context_docs if doc.get("matched_policies")])
+        # Process chunks with RAG concurrently for better performance; results stream
+        # back as they complete and are slotted into chunk order, with statistics
+        # accumulated as each arrives instead of in extra passes afterwards
+        context_docs = [None] * len(chunks)
+        total_policies = 0
+        chunks_with_policies = 0
+        async for i, doc in stream_rag_from_chunks(chunks, rag_config):
+            context_docs[i] = doc
+            matched_count = len(doc.get("matched_policies", []))
+            total_policies += matched_count
+            chunks_with_policies += matched_count > 0
 
         return {
             "status": "success",
@@ -264,102 +543,135 @@ async def query_rag_from_chunks(dlp_output: dict, project_id: str, rag_corpus_na
         }
 
 
+# Compact policy database with searchable text (fallback fuzzy matching); module-level
+# and immutable (tuples) so fallback calls never rebuild it
+POLICY_DATABASE = (
+    {
+        "policy_name": "HIPAA Privacy Rule",
+        "policy_text": "Protect patient health information with access controls, audit trails, and encryption",
+        "keywords": ("patient", "health", "protected information", "access control", "audit", "encryption")
+    },
+    {
+        "policy_name": "GDPR Data Protection",
+        "policy_text": "EU data subject rights including consent, data minimization, erasure, and portability",
+        "keywords": ("data protection", "consent", "privacy", "erasure", "portability", "gdpr")
+    },
+    {
+        "policy_name": "FDA 21 CFR Part 11",
+        "policy_text": "Electronic records and signatures with audit trails and data integrity controls",
+        "keywords": ("electronic signature", "audit trail", "data integrity", "fda", "validation")
+    },
+    {
+        "policy_name": "SOC2 Type II",
+        "policy_text": "Security, availability, processing integrity, confidentiality, and privacy controls",
+        "keywords": ("security", "availability", "confidentiality", "soc2", "controls")
+    },
+    {
+        "policy_name": "ISO 27001",
+        "policy_text": "Information security management with risk assessment and continuous improvement",
+        "keywords": ("information security", "risk management", "iso", "security controls")
+    }
+)
+
+# 🚀 PERFORMANCE: Every policy's keywords compiled into one RE2 Set (set index ==
+# POLICY_DATABASE index) so exact keyword hits for all policies come from a single
+# linear scan of the lowered chunk text instead of one substring scan per keyword
+def _compile_policy_keyword_set() -> re2.Set:
+    """Compile each policy's keywords into one alternation of a (case-sensitive) RE2 Set"""
+    keyword_set = re2.Set.SearchSet(re2.Options())
+    for policy in POLICY_DATABASE:
+        keyword_set.Add('|'.join(re2.escape(keyword.lower()) for keyword in policy["keywords"]))
+    keyword_set.Compile()
+    return keyword_set
+
+
+_POLICY_KEYWORD_SET = _compile_policy_keyword_set()
+
+# Lowercased keywords per policy (index == POLICY_DATABASE index), lowered once at import
+_POLICY_KEYWORDS_LOWER = tuple(
+    tuple(keyword.lower() for keyword in policy["keywords"]) for policy in POLICY_DATABASE
+)
+
+# Longest fallback keyword: bounds the best SequenceMatcher ratio any keyword can reach
+_MAX_KEYWORD_LEN = max(len(keyword) for keywords in _POLICY_KEYWORDS_LOWER for keyword in keywords)
+
+
 async def fallback_rag_processing(dlp_output: dict) -> dict:
     """
     Fallback RAG processing using fuzzy matching when RAG corpus is unavailable
 
     Uses difflib.SequenceMatcher for intelligent fuzzy matching (ratio > 0.7)
-    Deduplicates matched policies per chunk
+    Matches each policy at most once per chunk
     Returns same schema as main RAG for uniform UI parsing
     """
-    from difflib import SequenceMatcher
-
     print("🔄 Using fallback fuzzy-match RAG processing")
 
-    # Compact policy database with searchable text
-    POLICY_DATABASE = [
-        {
-            "policy_name": "HIPAA Privacy Rule",
-            "policy_text": "Protect patient health information with access controls, audit trails, and encryption",
-            "keywords": ["patient", "health", "protected information", "access control", "audit", "encryption"]
-        },
-        {
-            "policy_name": "GDPR Data Protection",
-            "policy_text": "EU data subject rights including consent, data minimization, erasure, and portability",
-            "keywords": ["data protection", "consent", "privacy", "erasure", "portability", "gdpr"]
-        },
-        {
-            "policy_name": "FDA 21 CFR Part 11",
-            "policy_text": "Electronic records and signatures with audit trails and data integrity controls",
-            "keywords": ["electronic signature", "audit trail", "data integrity", "fda", "validation"]
-        },
-        {
-            "policy_name": "SOC2 Type II",
-            "policy_text": "Security, availability, processing integrity, confidentiality, and privacy controls",
-            "keywords": ["security", "availability", "confidentiality", "soc2", "controls"]
-        },
-        {
-            "policy_name": "ISO 27001",
-            "policy_text": "Information security management with risk assessment and continuous improvement",
-            "keywords": ["information security", "risk management", "iso", "security controls"]
-        }
-    ]
-
     # Get chunks from DLP output (unified structure)
     chunks = dlp_output.get("chunks", [])
     context_docs = []
 
+    # 🚀 PERFORMANCE: One matcher per request; the chunk text is set as seq2 once per
+    # chunk so difflib indexes it once instead of once per (policy, keyword) pair
+    matcher = SequenceMatcher(None)
+
     for chunk in chunks:
-        chunk_text = chunk.get("masked_text", chunk.get("text", "")).lower()
-        matched_policies = {}  # Use dict for deduplication by policy_name
+        chunk_text_orig = chunk.get("masked_text", chunk.get("text", ""))
+        chunk_text = chunk_text_orig.lower()
+        # One slot per policy (policy names are unique, so at most one match each)
+        matched_policies = [None] * len(POLICY_DATABASE)
+        exact_hit_policies = _POLICY_KEYWORD_SET.Match(chunk_text) or ()
+
+        # 🚀 PERFORMANCE: ratio(keyword, text) <= 2*len(keyword)/(len(keyword)+len(text)),
+        # so once the text is long enough that even the longest keyword can't beat 0.7,
+        # no fuzzy score can matter: skip indexing the text and all per-keyword work
+        text_len = len(chunk_text)
+        fuzzy_possible = (
+            text_len < _MAX_KEYWORD_LEN
+            or 2.0 * _MAX_KEYWORD_LEN / (_MAX_KEYWORD_LEN + text_len) > 0.7
+        )
+        if fuzzy_possible:
+            matcher.set_seq2(chunk_text)
 
         # Fuzzy matching with difflib
-        for policy in POLICY_DATABASE:
+        for policy_index, policy in enumerate(POLICY_DATABASE):
+            # Check direct substring matches first: an exact keyword hit scores 0.9
+            exact_hit = policy_index in exact_hit_policies
+
+            # Check similarity against keywords. A ratio only matters if it can beat the
+            # 0.7 threshold (0.9 after an exact hit) and the best score so far, so use
+            # difflib's cheap upper bounds (real_quick_ratio, quick_ratio) to skip the
+            # full ratio() otherwise, like difflib.get_close_matches does. For a keyword
+            # against a long chunk the bound is tiny, so ratio() almost never runs.
             max_similarity = 0.0
+            floor = 0.9 if exact_hit else 0.7
+            for keyword in _POLICY_KEYWORDS_LOWER[policy_index] if fuzzy_possible else ():
+                matcher.set_seq1(keyword)
+                cutoff = max(floor, max_similarity)
+                if matcher.real_quick_ratio() > cutoff and matcher.quick_ratio() > cutoff:
+                    max_similarity = max(max_similarity, matcher.ratio())
 
-            # Check similarity against keywords
-            for keyword in policy["keywords"]:
-                similarity = SequenceMatcher(None, keyword.lower(), chunk_text).ratio()
-                max_similarity = max(max_similarity, similarity)
-
-            # Also check direct substring matches for exact keyword hits
-            for keyword in policy["keywords"]:
-                if keyword.lower() in chunk_text:
-                    max_similarity = max(max_similarity, 0.9)  # High score for exact matches
+            if exact_hit:
+                max_similarity = max(max_similarity, 0.9)  # High score for exact matches
 
             # Add policy if similarity exceeds threshold
             if max_similarity > 0.7:
-                # Deduplicate: only keep highest score per policy
-                if policy["policy_name"] not in matched_policies or matched_policies[policy["policy_name"]]["similarity_score"] < max_similarity:
-                    matched_policies[policy["policy_name"]] = {
-                        "policy_name": policy["policy_name"],
-                        "policy_text": policy["policy_text"],
-                        "similarity_score": round(max_similarity, 2),
-                        "source": "fallback_fuzzy_matching"
-                    }
-
-        # Convert dict back to list, sorted by similarity score descending
+                matched_policies[policy_index] = {
+                    "policy_name": policy["policy_name"],
+                    "policy_text": policy["policy_text"],
+                    "similarity_score": round(max_similarity, 2),
+                    "source": "fallback_fuzzy_matching"
+                }
+
+        # Matched policies sorted by similarity score descending
         matched_policies_list = sorted(
-            matched_policies.values(),
+            (match for match in matched_policies if match is not None),
             key=lambda x: x["similarity_score"],
             reverse=True
         )
 
-        chunk_text = chunk.get("masked_text", chunk.get("text", ""))
-        context_docs.append({
-            "chunk_id": chunk.get("chunk_id"),
-            "page_number": chunk.get("page_number", 1),
-            "text": chunk_text,
-            "original_text": chunk.get("original_text", chunk_text),  # 🚀 Pass original for Gemini
-            "requirement_entities": chunk.get("detected_requirements", chunk.get("requirement_entities", [])),
-            "compliance_entities": chunk.get("detected_compliance", chunk.get("compliance_entities", [])),
-            "matched_policies": matched_policies_list,
-            "bounding_box": chunk.get("bounding_box", {}),
-            "source_type": "prd_document",
-            "pii_found": chunk.get("pii_found", False),
-            "pii_types": chunk.get("pii_types", []),
-            "rag_response": "Fallback fuzzy matching used"
-        })
+        context_docs.append(
+            _rag_chunk_result(chunk, chunk_text_orig, matched_policies_list, "Fallback fuzzy matching used")
+        )
 
     return {
         "status": "success",